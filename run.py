@@ -13,22 +13,43 @@ Features:
 
 import os
 import sys
+import atexit
 import subprocess
 import shutil
+import functools
+import hashlib
+import importlib.util
+import mmap
+import platform
+import re
 import time
 import threading
 import http.server
-import socketserver
 import webbrowser
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 
+# Optional: file-change notifications for progress monitoring
+try:
+    from watchdog.observers import Observer
+    from watchdog.events import FileSystemEventHandler
+    HAS_WATCHDOG = True
+except ImportError:
+    HAS_WATCHDOG = False
+
 # Paths
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
 SRC_DIR = os.path.join(ROOT_DIR, 'src')
 BUILD_DIR = os.path.join(ROOT_DIR, 'build')
+CACHE_DIR = os.path.join(BUILD_DIR, 'cache')
 OUTPUT_DIR = os.path.join(ROOT_DIR, 'output')
 SCRIPTS_DIR = os.path.join(ROOT_DIR, 'scripts')
 
+# Static capture testbenches (top module and frame count are supplied at build/run time)
+TB_VERILOG = os.path.join(SCRIPTS_DIR, 'tb_capture.v')
+TB_CPP = os.path.join(SCRIPTS_DIR, 'tb_capture.cpp')
+
 # VGA timing constants
 H_DISPLAY = 640
 V_DISPLAY = 480
@@ -36,14 +57,36 @@ H_TOTAL = 800
 V_TOTAL = 525
 PIXEL_CLOCK_MHZ = 25.175
 
+# Raw capture format: one byte per pixel, packed as 00RRGGBB (2 bits per channel).
+# Expansion to 8-bit happens in Python through a 64-entry palette.
+EXPAND_2BIT = (0, 85, 170, 255)
+PALETTE_6BIT = [EXPAND_2BIT[(v >> shift) & 3] for v in range(64) for shift in (4, 2, 0)]
+FRAME_SIZE = H_DISPLAY * V_DISPLAY
+
+# Runs of up to this many frames are treated as quick previews (fast PNG compression)
+QUICK_FRAMES = 10
+
+# Number of most recently used build cache entries to keep
+CACHE_KEEP = 10
+
+# Verilator worker threads (frames are sequential, so parallelism is within a frame)
+SIM_THREADS = max(1, min(4, os.cpu_count() or 1))
+
 # Source files for each version
 SOURCES_SPHERE = ['vga_sphere.v', 'sphere_core.v', 'ray_sphere.v', 'vec_rotate2.v', 'vec_rotate3.v', 'dist_scale3d.v']
 SOURCES_FLOOR = ['vga_scene_sphere.v', 'scene_sphere.v', 'sphere_core.v', 'ray_sphere.v', 'vec_rotate2.v', 'vec_rotate3.v', 'dist_scale3d.v']
 SOURCES_COIN = ['vga_scene_coin.v', 'scene_coin.v', 'coin_core.v', 'ray_coin.v', 'vec_rotate2.v', 'vec_rotate3.v', 'dist_scale3d.v']
 
 
+# Windows consoles only honour ANSI escapes after VT processing is enabled; an empty
+# os.system() call does that once for the life of the process
+if os.name == 'nt':
+    os.system('')
+
+
 def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    sys.stdout.write('\033[H\033[2J\033[3J')
+    sys.stdout.flush()
 
 
 def print_header():
@@ -53,12 +96,20 @@ def print_header():
     print()
 
 
-def check_tools():
-    """Check for required tools and update PATH if needed"""
-    tools = {'iverilog': False, 'vvp': False, 'pillow': False}
+# Result of the last check_tools() call; the menu redraws would otherwise re-scan PATH
+_tools_cache = None
+
+
+def check_tools(force=False):
+    """Check for required tools and update PATH if needed (cached unless force=True)"""
+    global _tools_cache
+    if _tools_cache is not None and not force:
+        return _tools_cache
+    
+    tools = {'iverilog': False, 'vvp': False, 'verilator': False, 'pillow': False}
     
-    # Try to find iverilog, add common paths if not found
-    if not shutil.which('iverilog'):
+    # Try to find iverilog, add common paths if not found (only needed on the first check)
+    if _tools_cache is None and not shutil.which('iverilog'):
         # Common install locations on Windows
         common_paths = [
             r'C:\iverilog\bin',
@@ -75,12 +126,13 @@ def check_tools():
         tools['iverilog'] = True
     if shutil.which('vvp'):
         tools['vvp'] = True
-    try:
-        from PIL import Image
+    if shutil.which('verilator'):
+        tools['verilator'] = True
+    # Locate Pillow without importing it; it is only imported when frames are converted
+    if importlib.util.find_spec('PIL') is not None:
         tools['pillow'] = True
-    except ImportError:
-        pass
     
+    _tools_cache = tools
     return tools
 
 
@@ -109,9 +161,11 @@ def display_menu():
     # Show tool status
     print("─" * 40)
     iverilog_status = "✅" if tools['iverilog'] else "❌ (install from bleyer.org/icarus)"
+    verilator_status = "✅ (used when available)" if tools['verilator'] else "➖ (optional, 10-100x faster)"
     pillow_status = "✅" if tools['pillow'] else "❌ (pip install Pillow)"
-    print(f"  iverilog: {iverilog_status}")
-    print(f"  Pillow:   {pillow_status}")
+    print(f"  iverilog:  {iverilog_status}")
+    print(f"  verilator: {verilator_status}")
+    print(f"  Pillow:    {pillow_status}")
     print()
     
     return input("Enter your choice: ").strip().lower()
@@ -138,115 +192,58 @@ def get_frame_count():
         return 30
 
 
-def create_testbench(num_frames, top_module='vgasphere'):
-    """Create Verilog testbench for simulation"""
+def create_testbench():
+    """Prepare the build directory for a fresh capture run"""
     os.makedirs(BUILD_DIR, exist_ok=True)
     
     # Clean up old output file to ensure fresh simulation
     raw_file = os.path.join(BUILD_DIR, 'vga_output.raw')
     if os.path.exists(raw_file):
         os.remove(raw_file)
-    
-    tb_content = f'''`timescale 1ns / 1ps
-
-// Testbench for {top_module}
-module tb_capture;
-
-    parameter H_DISPLAY = 640;
-    parameter H_TOTAL = 800;
-    parameter V_DISPLAY = 480;
-    parameter V_TOTAL = 525;
-    parameter NUM_FRAMES = {num_frames};
-    
-    reg clk;
-    reg rst_n;
-    
-    wire hsync, vsync;
-    wire [1:0] r_out, g_out, b_out;
-    
-    integer h_count, v_count, frame_count;
-    integer pixel_file;
-    
-    {top_module} dut (
-        .clk(clk),
-        .rst_n(rst_n),
-        .hsync(hsync),
-        .vsync(vsync),
-        .r_out(r_out),
-        .g_out(g_out),
-        .b_out(b_out)
-    );
-    
-    initial begin
-        clk = 0;
-        forever #20 clk = ~clk;
-    end
-    
-    initial begin
-        pixel_file = $fopen("vga_output.raw", "wb");
-        if (pixel_file == 0) begin
-            $display("ERROR: Could not open output file");
-            $finish;
-        end
-        
-        rst_n = 0;
-        h_count = 0;
-        v_count = 0;
-        frame_count = 0;
-        
-        #100;
-        rst_n = 1;
-        $display("Starting VGA capture simulation...");
-        $display("Capturing %0d frames at %0dx%0d", NUM_FRAMES, H_DISPLAY, V_DISPLAY);
-        
-        while (frame_count < NUM_FRAMES) begin
-            @(posedge clk);
-            
-            if (h_count < H_DISPLAY && v_count < V_DISPLAY) begin
-                $fwrite(pixel_file, "%c%c%c", 
-                    {{r_out, r_out, r_out, r_out}},
-                    {{g_out, g_out, g_out, g_out}},
-                    {{b_out, b_out, b_out, b_out}});
-            end
-            
-            h_count = h_count + 1;
-            if (h_count >= H_TOTAL) begin
-                h_count = 0;
-                v_count = v_count + 1;
-                if (v_count >= V_TOTAL) begin
-                    v_count = 0;
-                    frame_count = frame_count + 1;
-                    $display("Frame %0d/%0d complete", frame_count, NUM_FRAMES);
-                end
-            end
-        end
-        
-        $fclose(pixel_file);
-        $display("Simulation complete! Output written to vga_output.raw");
-        $finish;
-    end
 
-endmodule
-'''
-    
-    tb_path = os.path.join(BUILD_DIR, 'tb_capture.v')
-    with open(tb_path, 'w') as f:
-        f.write(tb_content)
-    
-    return tb_path
+
+def hash_build_inputs(paths, *extra):
+    """Return a short content hash of the given files plus extra build settings"""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    for item in extra:
+        h.update(str(item).encode())
+    return h.hexdigest()[:16]
+
+
+def prune_build_cache(keep=CACHE_KEEP):
+    """Delete all but the most recently used build cache entries"""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    entries = sorted((os.path.join(CACHE_DIR, name) for name in os.listdir(CACHE_DIR)),
+                     key=os.path.getmtime, reverse=True)
+    for path in entries[keep:]:
+        if os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
 
 
 def build_simulation(sources, top_module):
-    """Build the Verilog simulation"""
+    """Build the Verilog simulation, reusing a cached .vvp when inputs are unchanged"""
     print("\n📦 Building Verilog Simulation...")
     print("-" * 40)
     
     source_files = [os.path.join(SRC_DIR, f) for f in sources]
-    tb_path = os.path.join(BUILD_DIR, 'tb_capture.v')
-    source_files.append(tb_path)
+    source_files.append(TB_VERILOG)
     
     output_file = os.path.join(BUILD_DIR, f'{top_module}.vvp')
-    cmd = ['iverilog', '-o', output_file, '-I', SRC_DIR] + source_files
+    cmd = ['iverilog', '-o', output_file, '-I', SRC_DIR, f'-DTOP_MODULE={top_module}'] + source_files
+    
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    cached = os.path.join(CACHE_DIR, f'{hash_build_inputs(source_files, top_module)}.vvp')
+    if os.path.exists(cached):
+        os.utime(cached)  # mark as recently used
+        shutil.copy(cached, output_file)
+        print(f"✅ Using cached build: {output_file}")
+        return output_file
     
     print(f"Compiling: {top_module}.vvp")
     result = subprocess.run(cmd, capture_output=True, text=True)
@@ -260,37 +257,98 @@ def build_simulation(sources, top_module):
         print("⚠️  Warnings:")
         print(result.stderr)
     
+    shutil.copy(output_file, cached)
+    prune_build_cache()
+    
     print(f"✅ Build successful: {output_file}")
     return output_file
 
 
-def monitor_progress(stop_event, num_frames):
-    """Monitor simulation progress in a separate thread"""
+def build_simulation_verilator(sources, top_module):
+    """Build the simulation with Verilator, reusing a cached binary when sources are unchanged"""
+    print("\n📦 Building Verilator Simulation...")
+    print("-" * 40)
+
+    source_files = [os.path.join(SRC_DIR, f) for f in sources]
+
+    # Cache key covers everything that ends up in the binary
+    build_dir = os.path.join(CACHE_DIR, hash_build_inputs(source_files + [TB_CPP], top_module, SIM_THREADS))
+    sim_name = 'sim.exe' if platform.system() == 'Windows' else 'sim'
+    sim_bin = os.path.join(build_dir, sim_name)
+
+    if os.path.exists(sim_bin):
+        os.utime(build_dir)  # mark as recently used
+        print(f"✅ Using cached build: {sim_bin}")
+        return sim_bin
+
+    cmd = [
+        'verilator',
+        '--cc', '--exe', '--build',
+        '-CFLAGS', '-O2',
+        '--threads', str(SIM_THREADS),
+        '-Wno-fatal', '-Wno-lint', '-Wno-style',
+        '--top-module', top_module,
+        '--prefix', 'Vtop',
+        '-I' + SRC_DIR,
+        '--Mdir', build_dir,
+        '-o', sim_name,
+    ] + source_files + [TB_CPP]
+
+    print(f"Compiling: {top_module} (verilator, {SIM_THREADS} threads)")
+    result = subprocess.run(cmd, capture_output=True, text=True)
+
+    if result.returncode != 0 or not os.path.exists(sim_bin):
+        print("❌ BUILD FAILED!")
+        print(result.stderr)
+        return None
+
+    prune_build_cache()
+    print(f"✅ Build successful: {sim_bin}")
+    return sim_bin
+
+
+def monitor_progress(proc, num_frames, done=None):
+    """Report progress as the raw output grows, until the simulator exits or done is set"""
     raw_file = os.path.join(BUILD_DIR, 'vga_output.raw')
-    frame_size = H_DISPLAY * V_DISPLAY * 3
-    
-    while not stop_event.is_set():
-        time.sleep(5)
+    frame_size = FRAME_SIZE
+    changed = threading.Event()
+    
+    observer = None
+    if HAS_WATCHDOG:
+        class RawFileHandler(FileSystemEventHandler):
+            def on_modified(self, event):
+                if os.path.basename(event.src_path) == 'vga_output.raw':
+                    changed.set()
         
-        if os.path.exists(raw_file):
-            size = os.path.getsize(raw_file)
-            frames_done = size // frame_size
-            percent = (frames_done / num_frames) * 100
+        observer = Observer()
+        observer.schedule(RawFileHandler(), BUILD_DIR, recursive=False)
+        observer.start()
+    
+    last_frames = -1
+    try:
+        while proc.poll() is None and not (done and done.is_set()):
+            # Wakes early on a file event with watchdog, otherwise polls once a second
+            if changed.wait(timeout=1):
+                changed.clear()
+                time.sleep(1)  # debounce to at most one report per second
             
-            # Check if vvp is still running
-            try:
-                result = subprocess.run(['tasklist', '/FI', 'IMAGENAME eq vvp.exe'], 
-                                       capture_output=True, text=True)
-                vvp_running = 'vvp.exe' in result.stdout
-            except:
-                vvp_running = True
+            if not os.path.exists(raw_file):
+                continue
             
-            if vvp_running:
+            size = os.path.getsize(raw_file)
+            frames_done = size // frame_size
+            if frames_done != last_frames:
+                last_frames = frames_done
+                percent = (frames_done / num_frames) * 100
                 print(f"  📊 Progress: {frames_done}/{num_frames} frames ({percent:.1f}%) - {size:,} bytes")
+    finally:
+        if observer:
+            observer.stop()
+            observer.join()
 
 
-def run_simulation(vvp_file, num_frames):
-    """Run the Verilog simulation with progress monitoring"""
+def run_simulation(cmd, num_frames):
+    """Run the simulation command with progress monitoring"""
     print("\n🚀 Running Verilog Simulation...")
     print("-" * 40)
     print(f"Simulating {num_frames} frames at 640x480")
@@ -301,37 +359,236 @@ def run_simulation(vvp_file, num_frames):
     old_cwd = os.getcwd()
     os.chdir(BUILD_DIR)
     
-    # Start progress monitoring thread
-    stop_event = threading.Event()
-    monitor_thread = threading.Thread(target=monitor_progress, args=(stop_event, num_frames))
-    monitor_thread.start()
-    
     start_time = time.time()
     
+    log_path = os.path.join(BUILD_DIR, 'sim.log')
+    tail = deque(maxlen=20)
+    
     try:
-        cmd = ['vvp', os.path.basename(vvp_file)]
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        # Stream simulator output to the console and sim.log as it arrives instead of buffering it
+        with open(log_path, 'w') as log_file:
+            proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                    bufsize=1, text=True)
+            
+            # Monitor watches the process handle directly instead of polling the task list
+            monitor_thread = threading.Thread(target=monitor_progress, args=(proc, num_frames), daemon=True)
+            monitor_thread.start()
+            
+            for line in proc.stdout:
+                log_file.write(line)
+                tail.append(line)
+                print(f"  {line}", end='')
+            
+            returncode = proc.wait()
         
         elapsed = time.time() - start_time
-        
-        # Stop monitoring
-        stop_event.set()
         monitor_thread.join()
         
-        if result.returncode != 0:
+        if returncode != 0:
             print("\n❌ SIMULATION FAILED!")
-            print(result.stderr)
+            print(''.join(tail))
+            print(f"Full log: {log_path}")
             return None, 0
         
         return elapsed, num_frames
         
     finally:
         os.chdir(old_cwd)
-        stop_event.set()
 
 
-def convert_raw_to_frames(num_frames, output_name='sphere'):
-    """Convert raw VGA output to PNG frames and GIF"""
+def frame_to_image(frame_data):
+    """Wrap one packed 6-bit frame as a palette image (no per-pixel expansion)"""
+    from PIL import Image
+    img = Image.frombytes('P', (H_DISPLAY, V_DISPLAY), frame_data)
+    img.putpalette(PALETTE_6BIT)
+    return img
+
+
+def _save_png(job):
+    """Encode one frame of the raw capture to PNG (runs in a worker process)"""
+    raw_file, index, filename, compress_level = job
+    # Workers read their own frame so no pixel data is pickled through the pool
+    with open(raw_file, 'rb') as f:
+        f.seek(index * FRAME_SIZE)
+        frame_to_image(f.read(FRAME_SIZE)).save(filename, compress_level=compress_level)
+    return filename
+
+
+# Persistent vvp processes for the Icarus backend, keyed by .vvp path.
+# Each entry is (process, content hash of the .vvp it was started with).
+_vvp_servers = {}
+
+
+def stop_vvp_servers():
+    """Shut down any persistent vvp processes"""
+    for proc, _ in _vvp_servers.values():
+        if proc.poll() is None:
+            try:
+                proc.stdin.write("0\n")
+                proc.stdin.flush()
+                proc.wait(timeout=5)
+            except (OSError, subprocess.TimeoutExpired):
+                proc.kill()
+    _vvp_servers.clear()
+
+
+atexit.register(stop_vvp_servers)
+
+
+def get_vvp_server(vvp_file):
+    """Return a running vvp process for this design, starting one if needed"""
+    key = hash_build_inputs([vvp_file])
+    entry = _vvp_servers.get(vvp_file)
+    if entry and entry[0].poll() is None and entry[1] == key:
+        print("♻️  Reusing running vvp process (design already elaborated)")
+        return entry[0]
+    
+    if entry and entry[0].poll() is None:
+        entry[0].kill()
+    
+    proc = subprocess.Popen(['vvp', os.path.basename(vvp_file), '+server'], cwd=BUILD_DIR,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            bufsize=1, text=True)
+    _vvp_servers[vvp_file] = (proc, key)
+    return proc
+
+
+def run_simulation_server(vvp_file, num_frames):
+    """Run a capture on a persistent vvp process so repeat runs skip startup and elaboration"""
+    print("\n🚀 Running Verilog Simulation...")
+    print("-" * 40)
+    print(f"Simulating {num_frames} frames at 640x480")
+    print("This may take several minutes...")
+    print()
+    
+    proc = get_vvp_server(vvp_file)
+    log_path = os.path.join(BUILD_DIR, 'sim.log')
+    tail = deque(maxlen=20)
+    completed = False
+    
+    done = threading.Event()
+    monitor_thread = threading.Thread(target=monitor_progress, args=(proc, num_frames, done), daemon=True)
+    
+    start_time = time.time()
+    
+    try:
+        with open(log_path, 'w') as log_file:
+            proc.stdin.write(f"{num_frames}\n")
+            proc.stdin.flush()
+            monitor_thread.start()
+            
+            for line in iter(proc.stdout.readline, ''):
+                if line.strip() == 'DONE':
+                    completed = True
+                    break
+                log_file.write(line)
+                tail.append(line)
+                print(f"  {line}", end='')
+    except OSError as e:
+        tail.append(f"{e}\n")
+    finally:
+        done.set()
+    
+    elapsed = time.time() - start_time
+    if monitor_thread.is_alive():
+        monitor_thread.join()
+    
+    if not completed:
+        print("\n❌ SIMULATION FAILED!")
+        print(''.join(tail))
+        print(f"Full log: {log_path}")
+        _vvp_servers.pop(vvp_file, None)
+        if proc.poll() is None:
+            proc.kill()
+        return None, 0
+    
+    return elapsed, num_frames
+
+
+def encode_gif_ffmpeg(frames_dir, gif_path, fps=20):
+    """Encode saved PNG frames to a GIF with ffmpeg's palettegen/paletteuse, if available"""
+    if not shutil.which('ffmpeg'):
+        return False
+    
+    cmd = [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-framerate', str(fps),
+        '-i', os.path.join(frames_dir, 'frame_%04d.png'),
+        '-vf', 'split[a][b];[a]palettegen[p];[b][p]paletteuse',
+        '-loop', '0',
+        gif_path,
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"⚠️  ffmpeg GIF encode failed, falling back to Pillow: {result.stderr.strip()}")
+        return False
+    return True
+
+
+def start_live_gif(gif_path, fps=20):
+    """Start an ffmpeg process that encodes a GIF from RGB frames on stdin, or return None"""
+    if not shutil.which('ffmpeg') or not check_tools()['pillow']:
+        return None
+    from PIL import Image
+    
+    # The capture only ever contains the 64 PALETTE_6BIT colours, so a fixed palette lets
+    # paletteuse stream frames straight through (palettegen would buffer the whole clip)
+    palette_png = os.path.join(BUILD_DIR, 'palette.png')
+    palette = Image.new('P', (16, 16))
+    palette.putpalette(PALETTE_6BIT * 4)
+    palette.putdata(range(256))
+    palette.convert('RGB').save(palette_png)
+    
+    cmd = [
+        'ffmpeg', '-y', '-loglevel', 'error',
+        '-f', 'rawvideo', '-pixel_format', 'rgb24',
+        '-video_size', f'{H_DISPLAY}x{V_DISPLAY}',
+        '-framerate', str(fps),
+        '-i', '-',
+        '-i', palette_png,
+        '-lavfi', '[0:v][1:v]paletteuse=dither=none',
+        '-loop', '0',
+        gif_path,
+    ]
+    return subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+
+def feed_live_gif(ffmpeg, done):
+    """Pipe each completed frame of the growing raw capture into ffmpeg until done is set"""
+    raw_file = os.path.join(BUILD_DIR, 'vga_output.raw')
+    sent = 0
+    f = None
+    try:
+        while True:
+            finished = done.is_set()
+            if f is None and os.path.exists(raw_file):
+                f = open(raw_file, 'rb')
+            if f is not None:
+                while os.path.getsize(raw_file) >= (sent + 1) * FRAME_SIZE:
+                    f.seek(sent * FRAME_SIZE)
+                    frame = frame_to_image(f.read(FRAME_SIZE)).convert('RGB')
+                    ffmpeg.stdin.write(frame.tobytes())
+                    sent += 1
+            if finished:
+                break
+            done.wait(0.5)
+    except OSError:
+        pass  # ffmpeg exited early; the caller sees its return code
+    finally:
+        if f is not None:
+            f.close()
+        try:
+            ffmpeg.stdin.close()
+        except OSError:
+            pass
+
+
+def convert_raw_to_frames(num_frames, output_name='sphere', quick=None, live_gif=None):
+    """Convert raw VGA output to PNG frames and GIF (quick previews use fast PNG compression)
+
+    live_gif is a GIF already encoded during the simulation; it is moved into place
+    instead of encoding a new one.
+    """
     print("\n🎨 Converting to PNG Frames...")
     print("-" * 40)
     
@@ -356,39 +613,60 @@ def convert_raw_to_frames(num_frames, output_name='sphere'):
     os.makedirs(frames_dir, exist_ok=True)
     os.makedirs(gifs_dir, exist_ok=True)
     
-    with open(raw_file, 'rb') as f:
-        data = f.read()
-    
-    frame_size = H_DISPLAY * V_DISPLAY * 3
-    actual_frames = len(data) // frame_size
+    frame_size = FRAME_SIZE
+    actual_frames = os.path.getsize(raw_file) // frame_size
     
     print(f"Found {actual_frames} frames in raw data")
     print(f"Saving frames to: {frames_dir}")
     
-    images = []
-    for i in range(actual_frames):
-        start = i * frame_size
-        end = start + frame_size
-        frame_data = data[start:end]
-        
-        img = Image.frombytes('RGB', (H_DISPLAY, V_DISPLAY), frame_data)
-        filename = os.path.join(frames_dir, f'frame_{i:04d}.png')
-        img.save(filename)
-        images.append(img)
-        
-        if (i + 1) % 10 == 0 or i == actual_frames - 1:
-            print(f"  Saved frame {i + 1}/{actual_frames}")
+    # Preview runs are looked at once; zlib level 1 is several times faster than the default 6
+    if quick is None:
+        quick = num_frames <= QUICK_FRAMES
+    compress_level = 1 if quick else 6
     
-    # Create GIF in gifs directory with timestamp
     gif_path = os.path.join(gifs_dir, f'{timestamped_name}.gif')
-    if images:
-        images[0].save(
-            gif_path,
-            save_all=True,
-            append_images=images[1:],
-            duration=50,
-            loop=0
-        )
+    if actual_frames:
+        # ffmpeg builds its palette from the finished PNGs; otherwise Pillow encodes the
+        # GIF alongside the PNG workers in a single pass over the mapped frames
+        use_ffmpeg = shutil.which('ffmpeg') is not None
+        
+        # Map the raw file instead of reading it; the OS pages in only the frames being sliced
+        with open(raw_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            def write_gif():
+                frames = (frame_to_image(data[i * frame_size:(i + 1) * frame_size])
+                          for i in range(actual_frames))
+                next(frames).save(
+                    gif_path,
+                    save_all=True,
+                    append_images=frames,
+                    duration=50,
+                    loop=0
+                )
+            
+            # PNG deflate is CPU-bound and independent per frame, so encode in parallel
+            frame_prefix = os.path.join(frames_dir, 'frame_')
+            jobs = ((raw_file, i, f'{frame_prefix}{i:04d}.png', compress_level)
+                    for i in range(actual_frames))
+            gif_thread = None
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+                saved = pool.map(_save_png, jobs, chunksize=4)
+                
+                # Workers are already started, so the GIF thread is never forked into them
+                if not use_ffmpeg and not live_gif:
+                    gif_thread = threading.Thread(target=write_gif)
+                    gif_thread.start()
+                
+                for i, _ in enumerate(saved):
+                    if (i + 1) % 10 == 0 or i == actual_frames - 1:
+                        print(f"  Saved frame {i + 1}/{actual_frames}")
+            
+            # Create GIF in gifs directory with timestamp
+            if live_gif:
+                shutil.move(live_gif, gif_path)
+            elif gif_thread:
+                gif_thread.join()
+            elif not encode_gif_ffmpeg(frames_dir, gif_path):
+                write_gif()
         print(f"\n✅ Created GIF: {gif_path}")
     
     # Also create a "latest" symlink/copy for the viewer
@@ -475,13 +753,25 @@ def print_completion_report(elapsed_time, num_frames, sim_type):
     print("═" * 60)
 
 
+class ViewerRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Static file handler that lets the browser cache timestamped GIFs"""
+    
+    def end_headers(self):
+        if self.path.endswith('.gif'):
+            # *_latest.gif is overwritten by every run; timestamped GIFs never change
+            if '_latest' in self.path:
+                self.send_header('Cache-Control', 'no-cache')
+            else:
+                self.send_header('Cache-Control', 'max-age=3600')
+        super().end_headers()
+
+
 def start_local_server(port=8080):
     """Start a local HTTP server to view results"""
-    os.chdir(OUTPUT_DIR)
-    
-    handler = http.server.SimpleHTTPRequestHandler
+    handler = functools.partial(ViewerRequestHandler, directory=OUTPUT_DIR)
     
-    with socketserver.TCPServer(("", port), handler) as httpd:
+    # One thread per request so the browser can fetch all GIFs concurrently
+    with http.server.ThreadingHTTPServer(("", port), handler) as httpd:
         print(f"\n🌐 Server running at http://localhost:{port}")
         print("Press Ctrl+C to stop the server")
         print()
@@ -495,157 +785,73 @@ def start_local_server(port=8080):
             print("\nServer stopped.")
 
 
-def create_viewer_html():
-    """Create HTML viewer for the output that shows all GIFs with improved layout"""
-    
-    # Find all GIF files in the gifs directory
-    gifs_dir = os.path.join(OUTPUT_DIR, 'gifs')
-    gif_files = []
-    if os.path.exists(gifs_dir):
-        gif_files = sorted([f for f in os.listdir(gifs_dir) if f.endswith('.gif')], reverse=True)
-    
-    # Categorize GIFs
-    latest_gifs = []
-    coin_gifs = []
-    floor_gifs = []
-    sphere_gifs = []
-    
-    for gif in gif_files:
-        if 'latest' in gif.lower():
-            latest_gifs.append(gif)
-        elif 'mario_coin' in gif.lower() or 'coin' in gif.lower():
-            coin_gifs.append(gif)
-        elif 'sphere_floor' in gif.lower() or 'floor' in gif.lower():
-            floor_gifs.append(gif)
-        elif 'sphere' in gif.lower():
-            sphere_gifs.append(gif)
-    
-    def get_timestamp(gif_name):
-        """Extract formatted timestamp from GIF filename"""
-        import re
-        match = re.search(r'_(\d{8})_(\d{6})\.gif$', gif_name)
-        if match:
-            date, time = match.groups()
-            return f"{date[4:6]}/{date[6:8]} {time[:2]}:{time[2:4]}"
-        return ''
-    
-    def get_type_name(gif_name):
-        """Get display name for GIF type"""
-        if 'coin' in gif_name.lower():
-            return '🪙 Mario Coin'
-        elif 'sphere_floor' in gif_name.lower() or 'floor' in gif_name.lower():
-            return '🏁 Sphere + Floor'
-        else:
-            return '🔮 Sphere Only'
-    
-    # Generate HTML for most recent (large)
-    recent_html = ""
-    for gif in latest_gifs[:3]:
-        name = get_type_name(gif)
-        recent_html += f'''
-        <div class="gif-container-large">
-            <h4>{name}</h4>
-            <span class="frame-count">Latest</span>
-            <img src="gifs/{gif}" alt="{name}" loading="lazy">
-        </div>
-'''
-    if not recent_html:
-        recent_html = '<p class="empty-group">No simulations yet. Run a simulation first!</p>'
-    
-    def generate_small_grid(gifs, max_items=15):
-        """Generate small GIF grid HTML"""
-        html = ""
-        for gif in gifs[:max_items]:
-            if 'latest' in gif.lower():
-                continue
-            timestamp = get_timestamp(gif)
-            html += f'''
-            <div class="gif-container-small">
-                <span class="gif-name">{timestamp}</span>
-                <img src="gifs/{gif}" alt="{gif}" loading="lazy">
-            </div>
-'''
-        if not html:
-            html = '<p class="empty-group">No simulations in this category</p>'
-        return html
-    
-    coin_html = generate_small_grid(coin_gifs)
-    floor_html = generate_small_grid(floor_gifs)
-    sphere_html = generate_small_grid(sphere_gifs)
-    
-    # Build the complete HTML
-    html_content = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>VGA Ray Marcher - Output Viewer</title>
-    <style>
-        body {{
+# Viewer page styles (constant, kept out of the per-call template)
+_CSS = """\
+        body {
             font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, sans-serif;
             max-width: 1400px;
             margin: 0 auto;
             padding: 20px;
             background: #1a1a2e;
             color: #eee;
-        }}
-        h1 {{ color: #ff6b6b; text-align: center; margin-bottom: 30px; }}
-        h2 {{ color: #4ecdc4; border-bottom: 2px solid #4ecdc4; padding-bottom: 10px; margin-top: 40px; }}
+        }
+        h1 { color: #ff6b6b; text-align: center; margin-bottom: 30px; }
+        h2 { color: #4ecdc4; border-bottom: 2px solid #4ecdc4; padding-bottom: 10px; margin-top: 40px; }
         
         /* Most Recent Section - Large GIFs */
-        .recent-container {{
+        .recent-container {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(400px, 1fr));
             gap: 25px;
             margin-bottom: 40px;
-        }}
-        .gif-container-large {{
+        }
+        .gif-container-large {
             background: linear-gradient(135deg, #16213e 0%, #1a1a2e 100%);
             padding: 20px;
             border-radius: 15px;
             text-align: center;
             border: 2px solid #4ecdc4;
             box-shadow: 0 4px 20px rgba(78, 205, 196, 0.2);
-        }}
-        .gif-container-large img {{
+        }
+        .gif-container-large img {
             max-width: 100%;
             border-radius: 8px;
             image-rendering: pixelated;
             margin-top: 10px;
-        }}
-        .gif-container-large h4 {{
+        }
+        .gif-container-large h4 {
             margin: 0 0 8px 0;
             color: #4ecdc4;
             font-size: 1.2rem;
-        }}
+        }
         
         /* History Section - Small GIFs */
-        .history-container {{
+        .history-container {
             display: grid;
             grid-template-columns: repeat(auto-fill, minmax(160px, 1fr));
             gap: 12px;
             margin-bottom: 30px;
-        }}
-        .gif-container-small {{
+        }
+        .gif-container-small {
             background: #16213e;
             padding: 10px;
             border-radius: 8px;
             text-align: center;
-        }}
-        .gif-container-small img {{
+        }
+        .gif-container-small img {
             max-width: 100%;
             border-radius: 4px;
             image-rendering: pixelated;
             margin-top: 5px;
-        }}
-        .gif-container-small .gif-name {{
+        }
+        .gif-container-small .gif-name {
             color: #4ecdc4;
             font-size: 0.75rem;
             display: block;
             margin-bottom: 3px;
-        }}
+        }
         
-        .frame-count {{
+        .frame-count {
             display: inline-block;
             background: #ff6b6b;
             color: #fff;
@@ -654,54 +860,157 @@ def create_viewer_html():
             font-size: 0.8rem;
             font-weight: bold;
             margin-bottom: 8px;
-        }}
+        }
         
-        .category-section {{
+        .category-section {
             margin-bottom: 40px;
-        }}
-        .category-title {{
+        }
+        .category-title {
             color: #888;
             font-size: 1rem;
             margin-bottom: 15px;
             display: flex;
             align-items: center;
             gap: 10px;
-        }}
-        .category-title::after {{
+        }
+        .category-title::after {
             content: '';
             flex: 1;
             height: 1px;
             background: #333;
-        }}
-        .empty-group {{
+        }
+        .empty-group {
             color: #666;
             font-style: italic;
             padding: 20px;
             text-align: center;
-        }}
+        }
         
-        .info {{
+        .info {
             background: #0f3460;
             padding: 20px;
             border-radius: 10px;
             margin-top: 30px;
-        }}
-        .info h3 {{ color: #ff6b6b; margin-top: 0; }}
-        .stats {{
+        }
+        .info h3 { color: #ff6b6b; margin-top: 0; }
+        .stats {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
             gap: 10px;
             margin-top: 15px;
-        }}
-        .stat {{
+        }
+        .stat {
             background: #16213e;
             padding: 10px;
             border-radius: 5px;
             text-align: center;
-        }}
-        .stat-value {{ font-size: 1.3rem; color: #4ecdc4; }}
-        .stat-label {{ font-size: 0.75rem; color: #888; }}
-    </style>
+        }
+        .stat-value { font-size: 1.3rem; color: #4ecdc4; }
+        .stat-label { font-size: 0.75rem; color: #888; }
+"""
+
+# Timestamp suffix of generated GIF names, e.g. sphere_verilog_20250101_120000.gif
+_TIMESTAMP_RE = re.compile(r'_(\d{8})_(\d{6})\.gif$')
+
+# Last generated viewer page, keyed by the gifs directory mtime
+_viewer_cache = {'mtime': None, 'html': None}
+
+
+def create_viewer_html():
+    """Create HTML viewer for the output that shows all GIFs with improved layout"""
+    
+    gifs_dir = os.path.join(OUTPUT_DIR, 'gifs')
+    viewer_path = os.path.join(OUTPUT_DIR, 'index.html')
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    
+    # Adding or removing a GIF bumps the directory mtime; otherwise reuse the last page
+    mtime = os.stat(gifs_dir).st_mtime_ns if os.path.exists(gifs_dir) else None
+    if _viewer_cache['html'] is not None and _viewer_cache['mtime'] == mtime:
+        if not os.path.exists(viewer_path):
+            with open(viewer_path, 'w', encoding='utf-8') as f:
+                f.write(_viewer_cache['html'])
+        return viewer_path
+    
+    # Find all GIF files in the gifs directory
+    gif_files = []
+    if mtime is not None:
+        gif_files = sorted([f for f in os.listdir(gifs_dir) if f.endswith('.gif')], reverse=True)
+    
+    # Categorize GIFs
+    latest_gifs = []
+    coin_gifs = []
+    floor_gifs = []
+    sphere_gifs = []
+    
+    for gif in gif_files:
+        name = gif.lower()
+        if 'latest' in name:
+            latest_gifs.append(gif)
+        elif 'coin' in name:
+            coin_gifs.append(gif)
+        elif 'floor' in name:
+            floor_gifs.append(gif)
+        elif 'sphere' in name:
+            sphere_gifs.append(gif)
+    
+    def get_timestamp(gif_name):
+        """Extract formatted timestamp from GIF filename"""
+        match = _TIMESTAMP_RE.search(gif_name)
+        if match:
+            date, time = match.groups()
+            return f"{date[4:6]}/{date[6:8]} {time[:2]}:{time[2:4]}"
+        return ''
+    
+    def get_type_name(gif_name):
+        """Get display name for GIF type"""
+        name = gif_name.lower()
+        if 'coin' in name:
+            return '🪙 Mario Coin'
+        elif 'floor' in name:
+            return '🏁 Sphere + Floor'
+        else:
+            return '🔮 Sphere Only'
+    
+    # Generate HTML for most recent (large)
+    parts = []
+    for gif in latest_gifs[:3]:
+        name = get_type_name(gif)
+        parts.append(f'''
+        <div class="gif-container-large">
+            <h4>{name}</h4>
+            <span class="frame-count">Latest</span>
+            <img src="gifs/{gif}" alt="{name}" loading="lazy">
+        </div>
+''')
+    recent_html = ''.join(parts)
+    if not recent_html:
+        recent_html = '<p class="empty-group">No simulations yet. Run a simulation first!</p>'
+    
+    def generate_small_grid(gifs, max_items=15):
+        """Generate small GIF grid HTML"""
+        html = ''.join(f'''
+            <div class="gif-container-small">
+                <span class="gif-name">{get_timestamp(gif)}</span>
+                <img src="gifs/{gif}" alt="{gif}" loading="lazy">
+            </div>
+''' for gif in gifs[:max_items] if 'latest' not in gif.lower())
+        if not html:
+            html = '<p class="empty-group">No simulations in this category</p>'
+        return html
+    
+    coin_html = generate_small_grid(coin_gifs)
+    floor_html = generate_small_grid(floor_gifs)
+    sphere_html = generate_small_grid(sphere_gifs)
+    
+    # Build the complete HTML
+    html_content = f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>VGA Ray Marcher - Output Viewer</title>
+    <style>
+{_CSS}    </style>
 </head>
 <body>
     <h1>🌐 VGA Sphere Ray Marcher</h1>
@@ -759,8 +1068,9 @@ def create_viewer_html():
 </html>
 '''
     
-    viewer_path = os.path.join(OUTPUT_DIR, 'index.html')
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    _viewer_cache['mtime'] = mtime
+    _viewer_cache['html'] = html_content
+    
     with open(viewer_path, 'w', encoding='utf-8') as f:
         f.write(html_content)
     return viewer_path
@@ -785,21 +1095,47 @@ def run_full_simulation(sim_type, num_frames):
         top_module = 'vga_scene_sphere'
         output_name = 'sphere_floor'
     
-    # Create testbench
-    create_testbench(num_frames, top_module)
+    # Build (Verilator when installed, Icarus otherwise); frame count is a runtime argument
+    create_testbench()
+    use_verilator = check_tools()['verilator']
+    if use_verilator:
+        sim_bin = build_simulation_verilator(sources, top_module)
+        if not sim_bin:
+            return False
+        sim_cmd = [sim_bin, str(num_frames)]
+    else:
+        vvp_file = build_simulation(sources, top_module)
+        if not vvp_file:
+            return False
+    
+    # With ffmpeg, encode the GIF from frames as the simulator writes them
+    live_gif = os.path.join(BUILD_DIR, 'live.gif')
+    ffmpeg = start_live_gif(live_gif)
+    if ffmpeg:
+        print("🎞️  Encoding GIF live with ffmpeg during simulation")
+        sim_done = threading.Event()
+        feeder = threading.Thread(target=feed_live_gif, args=(ffmpeg, sim_done), daemon=True)
+        feeder.start()
+    
+    # Run simulation with progress monitoring (Icarus reuses a running vvp per design)
+    if use_verilator:
+        elapsed_time, frames = run_simulation(sim_cmd, num_frames)
+    else:
+        elapsed_time, frames = run_simulation_server(vvp_file, num_frames)
     
-    # Build
-    vvp_file = build_simulation(sources, top_module)
-    if not vvp_file:
-        return False
+    if ffmpeg:
+        sim_done.set()
+        feeder.join()
+        if ffmpeg.wait() != 0 or elapsed_time is None:
+            live_gif = None
+    else:
+        live_gif = None
     
-    # Run simulation with progress monitoring
-    elapsed_time, frames = run_simulation(vvp_file, num_frames)
     if elapsed_time is None:
         return False
     
     # Convert to images
-    gif_path, actual_frames = convert_raw_to_frames(frames, output_name)
+    gif_path, actual_frames = convert_raw_to_frames(frames, output_name, live_gif=live_gif)
     if not gif_path:
         return False
     
@@ -907,11 +1243,12 @@ def main():
             print_header()
             
         elif choice == 't':
-            # Tool status
-            tools = check_tools()
+            # Tool status (re-scan in case something was installed meanwhile)
+            tools = check_tools(force=True)
             print("\n🔧 Tool Status:")
             print(f"  iverilog: {'✅ Installed' if tools['iverilog'] else '❌ Not found'}")
             print(f"  vvp:      {'✅ Installed' if tools['vvp'] else '❌ Not found'}")
+            print(f"  verilator: {'✅ Installed' if tools['verilator'] else '➖ Not found (optional)'}")
             print(f"  Pillow:   {'✅ Installed' if tools['pillow'] else '❌ Not found'}")
             input("\nPress Enter to continue...")
             clear_screen()
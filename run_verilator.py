@@ -21,11 +21,18 @@ import os
 import sys
 import subprocess
 import shutil
+import string
 import time
+import functools
+import hashlib
+import importlib.util
+import mmap
 import platform
+import re
 import http.server
 import socketserver
 import webbrowser
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 
 # Paths
@@ -42,6 +49,49 @@ H_TOTAL = 800
 V_TOTAL = 525
 PIXEL_CLOCK_MHZ = 25.175
 
+# 2-bit to 8-bit colour expansion, and the packed R|G<<8|B<<16 pixel for each 6-bit
+# {b, g, r} colour index (emitted into the C++ harness as a lookup table)
+EXPAND_2BIT = (0, 85, 170, 255)
+PIX_LUT = [EXPAND_2BIT[v & 3] | (EXPAND_2BIT[(v >> 2) & 3] << 8) | (EXPAND_2BIT[(v >> 4) & 3] << 16)
+           for v in range(64)]
+
+# Verilator model threads, used for runs of at least THREADS_MIN_FRAMES frames
+# (--threads N on the command line sets the count for every run)
+SIM_THREADS = max(1, min(os.cpu_count() or 1, 4))
+THREADS_MIN_FRAMES = 30
+
+# Verilator options shared by every build. The design is synthesisable and fully reset, so
+# X values can be resolved however is fastest, and it has no assertions to evaluate.
+# --output-split spreads the generated model over several .cpp files so make -j can
+# compile them in parallel.
+VERILATOR_FLAGS = ['-Wall', '-Wno-fatal', '-O2', '--x-assign', 'fast', '--x-initial', 'fast', '--noassert',
+                   '--output-split', '20000', '--output-split-cfuncs', '500']
+
+# C++ flags for the model: -O2 compiles the large generated eval() much faster than -O3
+# and runs about as fast
+CXX_FLAGS = '-O2 -march=native'
+
+# Runs of at least PGO_MIN_FRAMES frames get a profile-guided build, trained on a short run
+PGO_MIN_FRAMES = 140
+PGO_TRAIN_FRAMES = 5
+
+# Number of cached Verilator builds (one per distinct set of inputs) kept in BUILD_DIR
+CACHE_KEEP = 10
+
+# zlib level for the per-frame PNGs: 1 is several times faster than Pillow's default 6,
+# 0 stores the pixels uncompressed (fastest, ~900 KB per frame)
+PNG_COMPRESS_LEVEL = 1
+
+# Skip PNG frames and encode only the GIF (toggle with [g] or --gif-only)
+GIF_ONLY = False
+
+# Static first-frame previews for the Streamlit gallery, written to gifs/.thumbs/<name>.png
+THUMB_SIZE = (320, 240)
+
+# Stream frames from the simulator's stdout straight into the encoders instead of
+# round-tripping through build/verilator/vga_output.raw (--pipe on the command line)
+PIPE_MODE = False
+
 # Source files for each version
 SOURCES_SPHERE = ['vga_sphere.v', 'sphere_core.v', 'ray_sphere.v', 'vec_rotate2.v', 'vec_rotate3.v', 'dist_scale3d.v']
 SOURCES_FLOOR = ['vga_scene_sphere.v', 'scene_sphere.v', 'sphere_core.v', 'ray_sphere.v', 'vec_rotate2.v', 'vec_rotate3.v', 'dist_scale3d.v']
@@ -49,16 +99,46 @@ SOURCES_COIN = ['vga_scene_coin.v', 'scene_coin.v', 'coin_core.v', 'ray_coin.v',
 SOURCES_CUBE = ['vga_cube.v', 'cube_core.v', 'ray_cube.v', 'vec_rotate2.v', 'vec_rotate3.v']
 SOURCES_KIRBY = ['vga_kirby.v', 'kirby_core.v', 'ray_kirby.v', 'dist_scale3d.v']
 
+# Simulation type -> (sources, top module, output name)
+DESIGNS = {
+    'sphere': (SOURCES_SPHERE, 'vga_sphere', 'sphere_verilog'),
+    'floor': (SOURCES_FLOOR, 'vga_scene_sphere', 'sphere_floor'),
+    'coin': (SOURCES_COIN, 'vga_scene_coin', 'mario_coin'),
+    'cube': (SOURCES_CUBE, 'vga_cube', 'cube_verilog'),
+    'kirby': (SOURCES_KIRBY, 'vga_kirby', 'kirby_verilog'),
+}
+
+
+# Windows consoles only honour ANSI escapes after VT processing is enabled; an empty
+# os.system() call does that once for the life of the process
+if os.name == 'nt':
+    os.system('')
+
+
+_CLS = '\033[H\033[2J\033[3J'
+_HEADER = f"{'=' * 60}\n  🌐 VGA Sphere Ray Marcher - Interactive Runner\n{'=' * 60}\n\n"
+
 
 def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    # Escape codes instead of spawning cls/clear; fall back to the shell when not on a terminal
+    if not sys.stdout.isatty():
+        os.system('cls' if os.name == 'nt' else 'clear')
+        return
+    sys.stdout.write(_CLS)
+    sys.stdout.flush()
 
 
 def print_header():
-    print("=" * 60)
-    print("  🌐 VGA Sphere Ray Marcher - Interactive Runner")
-    print("=" * 60)
-    print()
+    sys.stdout.write(_HEADER)
+
+
+def redraw_screen():
+    """Clear the screen and print the header in a single write"""
+    if not sys.stdout.isatty():
+        redraw_screen()
+        return
+    sys.stdout.write(_CLS + _HEADER)
+    sys.stdout.flush()
 
 
 def check_tools():
@@ -69,11 +149,9 @@ def check_tools():
         tools['verilator'] = True
     if shutil.which('g++') or shutil.which('clang++') or shutil.which('cl.exe'):
         tools['g++'] = True
-    try:
-        from PIL import Image
+    # Only look Pillow up; it is imported where frames are converted
+    if importlib.util.find_spec('PIL') is not None:
         tools['pillow'] = True
-    except ImportError:
-        pass
     
     return tools
 
@@ -97,6 +175,8 @@ def display_menu():
     print()
     print("🔧 Other Options:")
     print("  [p] Python-only simulation (fast preview)")
+    print("  [r] Prebuild all designs in parallel")
+    print(f"  [g] GIF only, skip PNG frames ({'ON' if GIF_ONLY else 'OFF'})")
     print("  [s] Start local server to view results")
     print("  [t] Check tool status")
     print("  [q] Quit")
@@ -168,100 +248,203 @@ endmodule
     return wrapper_path
 
 
-def create_cpp_testbench(num_frames, wrapper_name):
-    """Create C++ testbench for Verilator"""
-    cpp_content = f'''#include "V{wrapper_name}.h"
+# Verilator C++ harness; ${...} fields are filled in by create_cpp_testbench
+TB_CPP_TEMPLATE = string.Template(r'''#include "V${wrapper_name}.h"
 #include "verilated.h"
 #include <iostream>
 #include <fstream>
-#include <vector>
 #include <chrono>
+#include <cstdint>
+#include <cstdlib>
+#include <cstring>
+#ifdef _WIN32
+#include <fcntl.h>
+#include <io.h>
+#endif
 
-const int H_DISPLAY = {H_DISPLAY};
-const int H_TOTAL = {H_TOTAL};
-const int V_DISPLAY = {V_DISPLAY};
-const int V_TOTAL = {V_TOTAL};
-const int NUM_FRAMES = {num_frames};
+const int H_DISPLAY = ${H_DISPLAY};
+const int H_TOTAL = ${H_TOTAL};
+const int V_DISPLAY = ${V_DISPLAY};
+const int V_TOTAL = ${V_TOTAL};
+const int FRAME_BYTES = H_DISPLAY * V_DISPLAY * 3;
 
-inline unsigned char extend_2bit(unsigned char val) {{
-    val &= 0x3;
-    return (val << 6) | (val << 4) | (val << 2) | val;
-}}
+// Packed R|G<<8|B<<16 pixel for each 6-bit {b, g, r} colour index: one load per pixel
+// instead of three separate 2-bit expansions
+static const uint32_t PIX_LUT[64] = {
+    ${pix_lut}
+};
 
-int main(int argc, char** argv) {{
+int main(int argc, char** argv) {
+    std::ios_base::sync_with_stdio(false);
     Verilated::commandArgs(argc, argv);
-    V{wrapper_name}* top = new V{wrapper_name};
-    
-    std::ofstream outfile("vga_output.raw", std::ios::binary);
-    if (!outfile) {{
-        std::cerr << "ERROR: Could not open output file" << std::endl;
+    // Frame count comes from the command line so one build serves every frame count
+    const int NUM_FRAMES = (argc > 1) ? atoi(argv[1]) : 30;
+    if (NUM_FRAMES <= 0) {
+        std::cerr << "ERROR: Invalid frame count" << std::endl;
         return 1;
-    }}
+    }
+    
+    V${wrapper_name}* top = new V${wrapper_name};
+    
+    // VGA_PIPE_MODE=1 streams frames to stdout for the runner to encode as they arrive;
+    // progress messages then go to stderr so they stay out of the pixel stream
+    const char* pipe_env = getenv("VGA_PIPE_MODE");
+    const bool pipe_mode = pipe_env && pipe_env[0] == '1';
+    std::ostream& log = pipe_mode ? std::cerr : std::cout;
+    
+    // Large stream buffer so several frames go out per write() instead of one each;
+    // it has to be installed before the file is opened to take effect
+    static char io_buf[1 << 22];
+    std::filebuf file_buf;
+    if (pipe_mode) {
+#ifdef _WIN32
+        _setmode(_fileno(stdout), _O_BINARY);
+#endif
+    } else {
+        file_buf.pubsetbuf(io_buf, sizeof(io_buf));
+        if (!file_buf.open("vga_output.raw", std::ios::out | std::ios::binary)) {
+            std::cerr << "ERROR: Could not open output file" << std::endl;
+            return 1;
+        }
+    }
+    std::ostream outfile(pipe_mode ? std::cout.rdbuf() : &file_buf);
     
-    std::cout << "Starting VGA capture simulation..." << std::endl;
-    std::cout << "Capturing " << NUM_FRAMES << " frames at " 
+    log << "Starting VGA capture simulation...\n";
+    log << "Capturing " << NUM_FRAMES << " frames at " 
               << H_DISPLAY << "x" << V_DISPLAY << std::endl;
     
     top->clk = 0;
     top->rst_n = 0;
     
-    for (int i = 0; i < 10; i++) {{
+    for (int i = 0; i < 10; i++) {
         top->clk = 0; top->eval();
         top->clk = 1; top->eval();
-    }}
+    }
     
     top->rst_n = 1;
     
-    int h_count = 0, v_count = 0, frame_count = 0;
-    std::vector<unsigned char> frame_buffer;
-    frame_buffer.reserve(H_DISPLAY * V_DISPLAY * 3);
+    // One 6-bit colour index per pixel, expanded into the RGB frame buffer once per frame
+    // (one spare byte for the last 4-byte store)
+    const int FRAME_PIXELS = H_DISPLAY * V_DISPLAY;
+    static unsigned char colour_idx[FRAME_PIXELS];
+    static unsigned char frame_buffer[FRAME_BYTES + 1];
+    
+    // One full clock cycle. Both phases need an eval: Verilator finds the rising edge by
+    // comparing clk with the value seen at the previous eval, so skipping the low-phase eval
+    // would hide every edge. The low-phase eval is cheap because nothing in the design is
+    // clocked on negedge.
+    auto tick = [top]() {
+        top->clk = 0; top->eval();
+        top->clk = 1; top->eval();
+    };
     
     auto start_time = std::chrono::high_resolution_clock::now();
     
-    while (frame_count < NUM_FRAMES) {{
-        top->clk = 0; top->eval();
-        top->clk = 1; top->eval();
-        
-        if (h_count < H_DISPLAY && v_count < V_DISPLAY) {{
-            frame_buffer.push_back(extend_2bit(top->r_out));
-            frame_buffer.push_back(extend_2bit(top->g_out));
-            frame_buffer.push_back(extend_2bit(top->b_out));
-        }}
+    // The frame is walked in fixed phases (visible pixels, horizontal blanking, vertical
+    // blanking), so there is no per-cycle visibility test or counter wrap-around check
+    for (int frame_count = 1; frame_count <= NUM_FRAMES; frame_count++) {
+        unsigned char* px = colour_idx;
+        for (int v = 0; v < V_DISPLAY; v++) {
+            for (int h = 0; h < H_DISPLAY; h++) {
+                tick();
+                *px++ = top->r_out | (top->g_out << 2) | (top->b_out << 4);
+            }
+            for (int h = H_DISPLAY; h < H_TOTAL; h++) {
+                tick();
+            }
+        }
+        for (int i = 0; i < (V_TOTAL - V_DISPLAY) * H_TOTAL; i++) {
+            tick();
+        }
         
-        h_count++;
-        if (h_count >= H_TOTAL) {{
-            h_count = 0;
-            v_count++;
-            if (v_count >= V_TOTAL) {{
-                v_count = 0;
-                frame_count++;
-                outfile.write(reinterpret_cast<const char*>(frame_buffer.data()), frame_buffer.size());
-                frame_buffer.clear();
-                std::cout << "Frame " << frame_count << "/" << NUM_FRAMES << " complete" << std::endl;
-            }}
-        }}
-    }}
+        // Copy the low 3 bytes of each packed pixel (little-endian: R, G, B)
+        for (int i = 0; i < FRAME_PIXELS; i++) {
+            memcpy(&frame_buffer[3 * i], &PIX_LUT[colour_idx[i]], 4);
+        }
+        outfile.write(reinterpret_cast<const char*>(frame_buffer), FRAME_BYTES);
+        // Flushed so the runner can show progress live; this happens at most every tenth frame
+        if (frame_count % 10 == 0 || frame_count == NUM_FRAMES) {
+            log << "Frame " << frame_count << "/" << NUM_FRAMES << " complete" << std::endl;
+        }
+    }
     
     auto end_time = std::chrono::high_resolution_clock::now();
     auto duration = std::chrono::duration_cast<std::chrono::milliseconds>(end_time - start_time).count();
     
-    std::cout << "Simulation complete! Output written to vga_output.raw" << std::endl;
+    log << "Simulation complete! Output written to " << (pipe_mode ? "stdout" : "vga_output.raw") << std::endl;
     
-    outfile.close();
+    outfile.flush();
     delete top;
     return 0;
-}}
-'''
-    
-    cpp_path = os.path.join(BUILD_DIR, 'tb_verilator.cpp')
+}
+''')
+
+
+def create_cpp_testbench(wrapper_name):
+    """Create C++ testbench for Verilator (frame count is passed as argv[1] at run time)"""
+    pix_lut = ',\n    '.join(', '.join(f'0x{v:06X}' for v in PIX_LUT[i:i + 8]) for i in range(0, 64, 8))
+    cpp_content = TB_CPP_TEMPLATE.substitute(
+        wrapper_name=wrapper_name,
+        H_DISPLAY=H_DISPLAY,
+        H_TOTAL=H_TOTAL,
+        V_DISPLAY=V_DISPLAY,
+        V_TOTAL=V_TOTAL,
+        pix_lut=pix_lut,
+    )
+    
+    cpp_path = os.path.join(BUILD_DIR, f'tb_{wrapper_name}.cpp')
     with open(cpp_path, 'w') as f:
         f.write(cpp_content)
     
     return cpp_path
 
 
+@functools.lru_cache(maxsize=None)
+def get_verilator_version():
+    """Return the installed Verilator version as a tuple, e.g. (5, 20), or None"""
+    try:
+        result = subprocess.run(['verilator', '--version'], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    match = re.search(r'Verilator (\d+)\.(\d+)', result.stdout)
+    return (int(match.group(1)), int(match.group(2))) if match else None
+
+
+@functools.lru_cache(maxsize=None)
+def get_lto_flags():
+    """Return link-time optimisation flags for the host g++ (10 or newer), or ''"""
+    if platform.system() == 'Windows' or not shutil.which('g++'):
+        return ''
+    try:
+        result = subprocess.run(['g++', '-dumpversion'], capture_output=True, text=True, timeout=10)
+        major = int(result.stdout.strip().split('.')[0])
+    except (OSError, subprocess.TimeoutExpired, ValueError):
+        return ''
+    # Fat objects keep regular code in libV*.a too, so the link works even if ar lacks the LTO plugin
+    return '-flto=auto -ffat-lto-objects' if major >= 10 else ''
+
+
+def hash_build_inputs(paths, *extra):
+    """Return a short content hash of the given files plus extra build settings"""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    for item in extra:
+        h.update(str(item).encode())
+    return h.hexdigest()[:16]
+
+
+def prune_build_cache(keep=CACHE_KEEP):
+    """Delete all but the most recently used cached build directories"""
+    entries = sorted((e.path for e in os.scandir(BUILD_DIR) if e.is_dir()),
+                     key=os.path.getmtime, reverse=True)
+    for path in entries[keep:]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
 def build_simulation(sources, top_module, num_frames):
-    """Build the Verilog simulation with Verilator"""
+    """Build the Verilog simulation with Verilator, reusing a cached build when inputs are unchanged"""
     print("\n📦 Building Verilog Simulation...")
     print("-" * 40)
     
@@ -271,7 +454,7 @@ def build_simulation(sources, top_module, num_frames):
     
     # Create wrapper and testbench
     wrapper_path = create_verilator_wrapper(top_module, wrapper_name)
-    cpp_path = create_cpp_testbench(num_frames, wrapper_name)
+    cpp_path = create_cpp_testbench(wrapper_name)
     
     # Collect source files
     source_files = [os.path.join(SRC_DIR, f) for f in sources]
@@ -283,39 +466,119 @@ def build_simulation(sources, top_module, num_frames):
             print(f"❌ Source file not found: {src}")
             return None
     
-    # Build with Verilator
-    cmd = [
-        'verilator',
-        '--cc', '--exe', '--build',
-        '-Wall', '-Wno-fatal',
-        '--top-module', wrapper_name,
-        '-I' + SRC_DIR,
-        '--Mdir', BUILD_DIR,
-        '-O2',
-    ]
+    # Multi-threaded eval only pays off on longer runs; short previews stay single-threaded
+    # to avoid the per-cycle thread synchronisation cost
+    threads = SIM_THREADS if num_frames >= THREADS_MIN_FRAMES else 1
+    
+    # Multi-threaded models need Verilator 4.034 or newer
+    version = get_verilator_version()
+    if threads > 1 and version is not None and version < (4, 34):
+        print(f"⚠️  Verilator {version[0]}.{version[1]:03d} is too old for --threads, building single-threaded")
+        threads = 1
     
-    cmd.extend(source_files)
-    cmd.append(cpp_path)
+    # Long runs amortise an instrumented build plus a training run (GCC/Clang only)
+    pgo = num_frames >= PGO_MIN_FRAMES and platform.system() != 'Windows'
+    
+    # Each distinct set of inputs gets its own object directory, so a repeat run skips Verilator
+    # and the C++ compile entirely
+    obj_dir = os.path.join(BUILD_DIR, hash_build_inputs(source_files + [cpp_path], top_module, threads, pgo,
+                                                        VERILATOR_FLAGS, CXX_FLAGS, get_lto_flags()))
+    exe_name = f'V{wrapper_name}.exe' if platform.system() == 'Windows' else f'V{wrapper_name}'
+    exe_path = os.path.join(obj_dir, exe_name)
+    
+    if os.path.exists(exe_path):
+        os.utime(obj_dir)  # mark as recently used
+        print(f"✅ Using cached build: {exe_path}")
+        return exe_path
+    
+    def verilate(cflags, ldflags=''):
+        """Run one Verilator build into obj_dir, streaming its warnings; True on success"""
+        cmd = [
+            'verilator',
+            '--cc', '--exe', '--build',
+            *VERILATOR_FLAGS,
+            '--top-module', wrapper_name,
+            '-I' + SRC_DIR,
+            '--Mdir', obj_dir,
+            '-CFLAGS', cflags,
+            # -j 0 runs one compile per core, but make only compiles the model's .cpp files
+            # separately (rather than as one __ALL.cpp) when VM_PARALLEL_BUILDS is set
+            '-j', '0',
+            '-MAKEFLAGS', 'VM_PARALLEL_BUILDS=1',
+        ]
+        if ldflags:
+            cmd.extend(['-LDFLAGS', ldflags])
+        
+        # Verilator's makefile prefixes every compile with $(OBJCACHE), so ccache can serve
+        # unchanged objects (runtime library, unchanged model files) from earlier builds
+        ccache = shutil.which('ccache')
+        if ccache:
+            cmd.extend(['-MAKEFLAGS', f'OBJCACHE={ccache}'])
+        
+        if threads > 1:
+            cmd.extend(['--threads', str(threads), '--threads-dpi', 'none'])
+        
+        cmd.extend(source_files)
+        cmd.append(cpp_path)
+        
+        # Stream warnings and errors as they are produced; make's progress chatter on stdout is dropped
+        proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, bufsize=1)
+        for line in proc.stderr:
+            print(f"  {line}", end='')
+        return proc.wait() == 0
+    
+    def remove_objects():
+        """Delete compiled objects so the next make recompiles everything with new flags"""
+        for entry in os.scandir(obj_dir):
+            if entry.name.endswith(('.o', '.a')) or entry.name == exe_name:
+                os.remove(entry.path)
     
     print(f"Compiling: {top_module}.vvp")
-    result = subprocess.run(cmd, capture_output=True, text=True)
     
-    if result.returncode != 0:
+    cflags = CXX_FLAGS
+    if pgo:
+        # Instrumented build, then a short run to record which paths of eval() are hot
+        print(f"Profiling: {PGO_TRAIN_FRAMES}-frame training run for profile-guided optimisation")
+        gen_flags = '-fprofile-generate' + (' -fprofile-update=atomic' if threads > 1 else '')
+        if not verilate(f'{cflags} {gen_flags}', gen_flags):
+            print("❌ BUILD FAILED!")
+            return None
+        subprocess.run([exe_path, str(PGO_TRAIN_FRAMES)], cwd=obj_dir,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        
+        # Drop the instrumented objects (the .gcda profiles stay) so make recompiles with them
+        remove_objects()
+        cflags += ' -fprofile-use -fprofile-correction'
+    
+    # Link-time optimisation lets g++ inline across the files produced by --output-split
+    lto = get_lto_flags()
+    if lto and not verilate(f'{cflags} {lto}', lto):
+        print("⚠️  LTO build failed, rebuilding without it")
+        remove_objects()
+        lto = ''
+    
+    if not lto and not verilate(cflags):
         print("❌ BUILD FAILED!")
-        print(result.stderr)
         return None
     
-    if result.stderr:
-        print("⚠️  Warnings:")
-        print(result.stderr)
-    
-    exe_name = f'V{wrapper_name}.exe' if platform.system() == 'Windows' else f'V{wrapper_name}'
-    exe_path = os.path.join(BUILD_DIR, exe_name)
+    prune_build_cache()
     
     print(f"✅ Build successful: {exe_path}")
     return exe_path
 
 
+def pin_simulation(pid, num_frames):
+    """Pin a single-threaded simulation to one core so the scheduler can't migrate it (Linux only)"""
+    threads = SIM_THREADS if num_frames >= THREADS_MIN_FRAMES else 1
+    if threads > 1 or platform.system() != 'Linux':
+        return
+    try:
+        # Use the last allowed core; core 0 usually takes most of the interrupt load
+        os.sched_setaffinity(pid, {max(os.sched_getaffinity(0))})
+    except OSError:
+        pass
+
+
 def run_simulation(exe_path, num_frames):
     """Run the Verilator simulation"""
     print("\n🚀 Running Verilog Simulation...")
@@ -324,33 +587,92 @@ def run_simulation(exe_path, num_frames):
     print("This may take a few seconds...")
     print()
     
-    # Change to build directory
-    old_cwd = os.getcwd()
-    os.chdir(BUILD_DIR)
-    
     start_time = time.time()
     
+    # Run in the build directory (where vga_output.raw is written) and show progress lines live
+    cmd = [exe_path, str(num_frames)]
+    proc = subprocess.Popen(cmd, cwd=BUILD_DIR, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                            text=True, bufsize=1)
+    pin_simulation(proc.pid, num_frames)
+    for line in proc.stdout:
+        print(line, end='')
+    
+    if proc.wait() != 0:
+        print("\n❌ SIMULATION FAILED!")
+        return None, 0
+    
+    elapsed = time.time() - start_time
+    return elapsed, num_frames
+
+
+def _encode_frame(args):
+    """Encode one raw RGB frame to PNG (runs in a worker process)"""
+    from PIL import Image
+    source, idx, out_path, compress_level = args
+    frame_size = H_DISPLAY * V_DISPLAY * 3
+    if isinstance(source, bytes):
+        frame_bytes = source
+    else:
+        # Workers read their own frame so no pixel data is pickled through the pool
+        with open(source, 'rb') as f:
+            f.seek(idx * frame_size)
+            frame_bytes = f.read(frame_size)
+    Image.frombytes('RGB', (H_DISPLAY, V_DISPLAY), frame_bytes).save(out_path, optimize=False, compress_level=compress_level)
+    return idx
+
+
+def _iter_frames(data, count):
+    """Yield raw RGB frames as images, one at a time, without copying the raw data"""
+    from PIL import Image
+    frame_size = H_DISPLAY * V_DISPLAY * 3
+    mv = memoryview(data)
+    for i in range(count):
+        yield Image.frombuffer('RGB', (H_DISPLAY, V_DISPLAY), mv[i * frame_size:(i + 1) * frame_size], 'raw', 'RGB', 0, 1)
+
+
+def _gif_palette():
+    """Fixed 64-colour palette image holding every colour the capture can produce"""
+    from PIL import Image
+    palette = Image.new('P', (1, 1))
+    palette.putpalette([c for v in PIX_LUT for c in (v & 0xFF, (v >> 8) & 0xFF, v >> 16)])
+    return palette
+
+
+def save_gif_thumbnail(frame, gif_path):
+    """Save a small static PNG of a GIF's first frame for the gallery grid"""
+    thumbs_dir = os.path.join(os.path.dirname(gif_path), '.thumbs')
+    os.makedirs(thumbs_dir, exist_ok=True)
+    thumb = frame.copy()
+    thumb.thumbnail(THUMB_SIZE)
+    thumb.save(os.path.join(thumbs_dir, os.path.splitext(os.path.basename(gif_path))[0] + '.png'))
+
+
+def _update_latest_gif(gif_path, gifs_dir, output_name):
+    """Copy a finished GIF to {output_name}_latest.gif for the viewer"""
+    latest_gif = os.path.join(gifs_dir, f'{output_name}_latest.gif')
     try:
-        cmd = [f'./{os.path.basename(exe_path)}' if platform.system() != 'Windows' else os.path.basename(exe_path)]
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        
-        elapsed = time.time() - start_time
-        
-        if result.returncode != 0:
-            print("\n❌ SIMULATION FAILED!")
-            print(result.stderr)
-            return None, 0
-        
-        print(result.stdout)
-        return elapsed, num_frames
-        
-    finally:
-        os.chdir(old_cwd)
+        if os.path.exists(latest_gif):
+            os.remove(latest_gif)
+        shutil.copy(gif_path, latest_gif)
+        print(f"✅ Updated latest: {latest_gif}")
+    except Exception as e:
+        print(f"⚠️  Could not create latest copy: {e}")
+
 
+@functools.lru_cache(maxsize=None)
+def pillow_simd_hint():
+    """Suggest Pillow-SIMD once per session when stock Pillow is doing the PNG encoding"""
+    import PIL
+    # Pillow-SIMD releases carry a .postN suffix on the upstream version they track
+    if '.post' not in PIL.__version__:
+        print("💡 PNG encoding is faster with Pillow-SIMD: pip uninstall -y Pillow && pip install pillow-simd")
 
-def convert_raw_to_frames(num_frames, output_name='sphere'):
+
+def convert_raw_to_frames(num_frames, output_name='sphere', gif_only=None):
     """Convert raw VGA output to PNG frames and GIF"""
-    print("\n🎨 Converting to PNG Frames...")
+    if gif_only is None:
+        gif_only = GIF_ONLY
+    print("\n🎨 Converting to GIF..." if gif_only else "\n🎨 Converting to PNG Frames...")
     print("-" * 40)
     
     try:
@@ -371,57 +693,142 @@ def convert_raw_to_frames(num_frames, output_name='sphere'):
     # Create organized output directories with timestamp
     frames_dir = os.path.join(OUTPUT_DIR, 'frames', timestamped_name)
     gifs_dir = os.path.join(OUTPUT_DIR, 'gifs')
-    os.makedirs(frames_dir, exist_ok=True)
     os.makedirs(gifs_dir, exist_ok=True)
     
-    with open(raw_file, 'rb') as f:
-        data = f.read()
-    
     frame_size = H_DISPLAY * V_DISPLAY * 3
-    actual_frames = len(data) // frame_size
+    actual_frames = os.path.getsize(raw_file) // frame_size
     
     print(f"Found {actual_frames} frames in raw data")
-    print(f"Saving frames to: {frames_dir}")
     
-    images = []
-    for i in range(actual_frames):
-        start = i * frame_size
-        end = start + frame_size
-        frame_data = data[start:end]
+    if not gif_only:
+        pillow_simd_hint()
+        os.makedirs(frames_dir, exist_ok=True)
+        print(f"Saving frames to: {frames_dir}")
         
-        img = Image.frombytes('RGB', (H_DISPLAY, V_DISPLAY), frame_data)
-        filename = os.path.join(frames_dir, f'frame_{i:04d}.png')
-        img.save(filename)
-        images.append(img)
-        
-        if (i + 1) % 10 == 0 or i == actual_frames - 1:
-            print(f"  Saved frame {i + 1}/{actual_frames}")
-    
-    # Create GIF in gifs directory with timestamp
+        # PNG encoding is CPU-bound zlib work and independent per frame: spread it over all cores
+        frame_prefix = os.path.join(frames_dir, 'frame_')
+        args = [(raw_file, i, f'{frame_prefix}{i:04d}.png', PNG_COMPRESS_LEVEL)
+                for i in range(actual_frames)]
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+            for done, _ in enumerate(ex.map(_encode_frame, args), 1):
+                if done % 10 == 0 or done == actual_frames:
+                    print(f"  Saved frame {done}/{actual_frames}")
+    
+    # Create GIF in gifs directory with timestamp, decoding frames as the encoder asks for them
     gif_path = os.path.join(gifs_dir, f'{timestamped_name}.gif')
-    if images:
-        images[0].save(
-            gif_path,
-            save_all=True,
-            append_images=images[1:],
-            duration=50,
-            loop=0
-        )
+    if actual_frames:
+        # Map the raw file instead of reading it; the OS pages in only the frame being decoded
+        with open(raw_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            # The capture only ever holds the 64 PIX_LUT colours, so map each frame onto that
+            # fixed palette rather than letting the GIF encoder build an adaptive one per frame
+            palette = _gif_palette()
+            frames = (img.quantize(palette=palette, dither=0) for img in _iter_frames(data, actual_frames))
+            first = next(frames)
+            first.save(
+                gif_path,
+                save_all=True,
+                append_images=frames,
+                duration=50,
+                loop=0,
+                optimize=False
+            )
+            save_gif_thumbnail(next(_iter_frames(data, 1)), gif_path)
         print(f"\n✅ Created GIF: {gif_path}")
     
     # Also create a "latest" symlink/copy for the viewer
-    latest_gif = os.path.join(gifs_dir, f'{output_name}_latest.gif')
-    try:
-        if os.path.exists(latest_gif):
-            os.remove(latest_gif)
-        shutil.copy(gif_path, latest_gif)
-        print(f"✅ Updated latest: {latest_gif}")
-    except Exception as e:
-        print(f"⚠️  Could not create latest copy: {e}")
+    _update_latest_gif(gif_path, gifs_dir, output_name)
     
     return gif_path, actual_frames
 
 
+def stream_simulation_to_frames(exe_path, num_frames, output_name='sphere', gif_only=None):
+    """Run the simulation in pipe mode, encoding PNG frames and the GIF as frames arrive"""
+    if gif_only is None:
+        gif_only = GIF_ONLY
+    print("\n🚀 Running Verilog Simulation (streaming frames)...")
+    print("-" * 40)
+    print(f"Simulating {num_frames} frames at 640x480")
+    print()
+    
+    try:
+        from PIL import Image
+    except ImportError:
+        print("❌ Pillow not installed. Run: pip install Pillow")
+        return None, None, 0
+    
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    timestamped_name = f'{output_name}_{timestamp}'
+    frames_dir = os.path.join(OUTPUT_DIR, 'frames', timestamped_name)
+    gifs_dir = os.path.join(OUTPUT_DIR, 'gifs')
+    os.makedirs(gifs_dir, exist_ok=True)
+    if not gif_only:
+        pillow_simd_hint()
+        os.makedirs(frames_dir, exist_ok=True)
+        print(f"Saving frames to: {frames_dir}")
+    gif_path = os.path.join(gifs_dir, f'{timestamped_name}.gif')
+    frame_prefix = os.path.join(frames_dir, 'frame_')
+    
+    frame_size = H_DISPLAY * V_DISPLAY * 3
+    palette = _gif_palette()
+    start_time = time.time()
+    
+    # Pixels arrive on stdout; the harness sends its progress lines to stderr, which stays on the console
+    env = dict(os.environ, VGA_PIPE_MODE='1')
+    proc = subprocess.Popen([exe_path, str(num_frames)], cwd=BUILD_DIR, env=env, stdout=subprocess.PIPE)
+    pin_simulation(proc.pid, num_frames)
+    
+    pending = []
+    received = 0
+    thumb_frame = None
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as ex:
+        
+        def frames():
+            # Each frame goes to a PNG worker and, quantized, to the GIF encoder while the
+            # simulator is still producing the next one
+            nonlocal received, thumb_frame
+            for i in range(num_frames):
+                frame_bytes = proc.stdout.read(frame_size)
+                if len(frame_bytes) < frame_size:
+                    return
+                received += 1
+                if not gif_only:
+                    out_path = f'{frame_prefix}{i:04d}.png'
+                    pending.append(ex.submit(_encode_frame, (frame_bytes, i, out_path, PNG_COMPRESS_LEVEL)))
+                img = Image.frombuffer('RGB', (H_DISPLAY, V_DISPLAY), frame_bytes, 'raw', 'RGB', 0, 1)
+                if i == 0:
+                    thumb_frame = img
+                yield img.quantize(palette=palette, dither=0)
+        
+        gif_frames = frames()
+        first = next(gif_frames, None)
+        if first is not None:
+            first.save(
+                gif_path,
+                save_all=True,
+                append_images=gif_frames,
+                duration=50,
+                loop=0,
+                optimize=False
+            )
+            save_gif_thumbnail(thumb_frame, gif_path)
+        proc.stdout.close()
+        returncode = proc.wait()
+        for future in pending:
+            future.result()
+    
+    elapsed = time.time() - start_time
+    if returncode != 0 or not received:
+        print("\n❌ SIMULATION FAILED!")
+        return None, None, 0
+    
+    if not gif_only:
+        print(f"  Saved {len(pending)} frames")
+    print(f"\n✅ Created GIF: {gif_path}")
+    _update_latest_gif(gif_path, gifs_dir, output_name)
+    
+    return elapsed, gif_path, received
+
+
 def print_completion_report(elapsed_time, num_frames, sim_type):
     """Print detailed completion report"""
     print()
@@ -513,6 +920,25 @@ def start_local_server(port=8080):
             print("\nServer stopped.")
 
 
+# Timestamped GIF names, e.g. sphere_verilog_20250101_120000.gif
+_TS_RE = re.compile(r'(.+)_\d{8}_\d{6}\.gif$')
+
+
+@functools.lru_cache(maxsize=None)
+def _frame_count_from_name(gif_name):
+    """Extract frame count from GIF by checking the frames directory"""
+    # A timestamped run's frames directory is never rewritten, so the count can be cached
+    match = _TS_RE.search(gif_name)
+    if match:
+        base_name = match.group(0).replace('.gif', '')
+        frames_dir = os.path.join(OUTPUT_DIR, 'frames', base_name)
+        if os.path.exists(frames_dir):
+            with os.scandir(frames_dir) as it:
+                count = sum(1 for e in it if e.name.startswith('frame_') and e.name.endswith('.png'))
+            return f"{count} frames"
+    return ''
+
+
 def create_viewer_html():
     """Create HTML viewer for the output that shows all GIFs with improved layout"""
     
@@ -520,7 +946,8 @@ def create_viewer_html():
     gifs_dir = os.path.join(OUTPUT_DIR, 'gifs')
     gif_files = []
     if os.path.exists(gifs_dir):
-        gif_files = sorted([f for f in os.listdir(gifs_dir) if f.endswith('.gif')], reverse=True)
+        with os.scandir(gifs_dir) as it:
+            gif_files = sorted([e.name for e in it if e.name.endswith('.gif')], reverse=True)
     
     # Categorize GIFs
     latest_gifs = []
@@ -530,32 +957,19 @@ def create_viewer_html():
     cube_gifs = []
     kirby_gifs = []
     
+    # First matching keyword wins, so 'sphere' must stay after 'floor' (sphere_floor_*.gif)
+    kinds = (('coin', coin_gifs), ('floor', floor_gifs), ('cube', cube_gifs),
+             ('kirby', kirby_gifs), ('sphere', sphere_gifs))
+    
     for gif in gif_files:
-        if 'latest' in gif.lower():
+        name = gif.lower()
+        if 'latest' in name:
             latest_gifs.append(gif)
-        elif 'mario_coin' in gif.lower() or 'coin' in gif.lower():
-            coin_gifs.append(gif)
-        elif 'sphere_floor' in gif.lower() or 'floor' in gif.lower():
-            floor_gifs.append(gif)
-        elif 'cube' in gif.lower():
-            cube_gifs.append(gif)
-        elif 'kirby' in gif.lower():
-            kirby_gifs.append(gif)
-        elif 'sphere' in gif.lower():
-            sphere_gifs.append(gif)
-    
-    def get_frame_count_from_name(gif_name):
-        """Extract frame count from GIF by checking the frames directory"""
-        import re
-        # Try to extract the timestamped name
-        match = re.search(r'(.+)_\d{8}_\d{6}\.gif$', gif_name)
-        if match:
-            base_name = match.group(0).replace('.gif', '')
-            frames_dir = os.path.join(OUTPUT_DIR, 'frames', base_name)
-            if os.path.exists(frames_dir):
-                frame_files = [f for f in os.listdir(frames_dir) if f.startswith('frame_') and f.endswith('.png')]
-                return f"{len(frame_files)} frames"
-        return ''
+            continue
+        for key, bucket in kinds:
+            if key in name:
+                bucket.append(gif)
+                break
     
     def get_type_name(gif_name):
         """Get display name for GIF type"""
@@ -590,7 +1004,7 @@ def create_viewer_html():
         for gif in gifs[:max_items]:
             if 'latest' in gif.lower():
                 continue
-            frame_info = get_frame_count_from_name(gif)
+            frame_info = _frame_count_from_name(gif)
             html += f'''
             <div class="gif-container-small">
                 <span class="gif-name">{frame_info}</span>
@@ -814,47 +1228,46 @@ def create_viewer_html():
     return viewer_path
 
 
+def prebuild_all(num_frames=THREADS_MIN_FRAMES):
+    """Build every design in parallel so later menu runs hit the build cache"""
+    print(f"\n📦 Prebuilding {len(DESIGNS)} designs...")
+    start_time = time.time()
+    
+    # Each build is an external verilator/make process, so threads are enough to overlap them
+    with ThreadPoolExecutor(max_workers=len(DESIGNS)) as ex:
+        futures = {name: ex.submit(build_simulation, sources, top_module, num_frames)
+                   for name, (sources, top_module, _) in DESIGNS.items()}
+    
+    print()
+    for name, future in futures.items():
+        print(f"  {name:8s} {'✅' if future.result() else '❌'}")
+    print(f"\nPrebuilt in {time.time() - start_time:.1f} seconds")
+
+
 def run_full_simulation(sim_type, num_frames):
     """Run complete simulation pipeline"""
-    if sim_type == 'sphere':
-        sources = SOURCES_SPHERE
-        top_module = 'vga_sphere'
-        output_name = 'sphere_verilog'
-    elif sim_type == 'floor':
-        sources = SOURCES_FLOOR
-        top_module = 'vga_scene_sphere'
-        output_name = 'sphere_floor'
-    elif sim_type == 'coin':
-        sources = SOURCES_COIN
-        top_module = 'vga_scene_coin'
-        output_name = 'mario_coin'
-    elif sim_type == 'cube':
-        sources = SOURCES_CUBE
-        top_module = 'vga_cube'
-        output_name = 'cube_verilog'
-    elif sim_type == 'kirby':
-        sources = SOURCES_KIRBY
-        top_module = 'vga_kirby'
-        output_name = 'kirby_verilog'
-    else:
-        sources = SOURCES_FLOOR
-        top_module = 'vga_scene_sphere'
-        output_name = 'sphere_floor'
+    sources, top_module, output_name = DESIGNS.get(sim_type, DESIGNS['floor'])
     
     # Build
     exe_path = build_simulation(sources, top_module, num_frames)
     if not exe_path:
         return False
     
-    # Run simulation
-    elapsed_time, frames = run_simulation(exe_path, num_frames)
-    if elapsed_time is None:
-        return False
-    
-    # Convert to images
-    gif_path, actual_frames = convert_raw_to_frames(frames, output_name)
-    if not gif_path:
-        return False
+    if PIPE_MODE:
+        # Simulate and encode in one pass, frames streamed over a pipe
+        elapsed_time, gif_path, actual_frames = stream_simulation_to_frames(exe_path, num_frames, output_name)
+        if elapsed_time is None:
+            return False
+    else:
+        # Run simulation
+        elapsed_time, frames = run_simulation(exe_path, num_frames)
+        if elapsed_time is None:
+            return False
+        
+        # Convert to images
+        gif_path, actual_frames = convert_raw_to_frames(frames, output_name)
+        if not gif_path:
+            return False
     
     # Print report
     sim_names = {
@@ -876,11 +1289,11 @@ def run_full_simulation(sim_type, num_frames):
 
 def main():
     """Main interactive loop"""
+    global GIF_ONLY
     # Initialize PATH at startup
     check_tools()
     
-    clear_screen()
-    print_header()
+    redraw_screen()
     
     while True:
         choice = display_menu()
@@ -888,79 +1301,63 @@ def main():
         if choice == '1':
             # Sphere only
             num_frames = get_frame_count()
-            clear_screen()
-            print_header()
+            redraw_screen()
             run_full_simulation('sphere', num_frames)
             input("\nPress Enter to continue...")
-            clear_screen()
-            print_header()
+            redraw_screen()
             
         elif choice == '2':
             # Sphere + floor
             num_frames = get_frame_count()
-            clear_screen()
-            print_header()
+            redraw_screen()
             run_full_simulation('floor', num_frames)
             input("\nPress Enter to continue...")
-            clear_screen()
-            print_header()
+            redraw_screen()
             
         elif choice == '3':
             # Mario coin
             num_frames = get_frame_count()
-            clear_screen()
-            print_header()
+            redraw_screen()
             run_full_simulation('coin', num_frames)
             input("\nPress Enter to continue...")
-            clear_screen()
-            print_header()
+            redraw_screen()
             
         elif choice == '4':
             # Rotating cube
             num_frames = get_frame_count()
-            clear_screen()
-            print_header()
+            redraw_screen()
             run_full_simulation('cube', num_frames)
             input("\nPress Enter to continue...")
-            clear_screen()
-            print_header()
+            redraw_screen()
             
         elif choice == '5':
             # Kirby
             num_frames = get_frame_count()
-            clear_screen()
-            print_header()
+            redraw_screen()
             run_full_simulation('kirby', num_frames)
             input("\nPress Enter to continue...")
-            clear_screen()
-            print_header()
+            redraw_screen()
             
         elif choice == 'a':
             # Quick 10 frames - sphere
-            clear_screen()
-            print_header()
+            redraw_screen()
             run_full_simulation('sphere', 10)
             input("\nPress Enter to continue...")
-            clear_screen()
-            print_header()
+            redraw_screen()
             
         elif choice == 'b':
             # Standard 30 frames - sphere
-            clear_screen()
-            print_header()
+            redraw_screen()
             run_full_simulation('sphere', 30)
             input("\nPress Enter to continue...")
-            clear_screen()
-            print_header()
+            redraw_screen()
             
         elif choice == 'c':
             # Full 140 frames - sphere
-            clear_screen()
-            print_header()
+            redraw_screen()
             run_full_simulation('sphere', 140)
             input("\nPress Enter to continue...")
-            clear_screen()
-            print_header()
+            redraw_screen()
             
         elif choice == 'p':
             # Python simulation
@@ -971,15 +1368,24 @@ def main():
             else:
                 print(f"❌ Script not found: {script}")
             input("\nPress Enter to continue...")
-            clear_screen()
-            print_header()
+            redraw_screen()
+            
+        elif choice == 'r':
+            # Prebuild every design
+            prebuild_all()
+            input("\nPress Enter to continue...")
+            redraw_screen()
+            
+        elif choice == 'g':
+            # Toggle GIF-only output
+            GIF_ONLY = not GIF_ONLY
+            redraw_screen()
             
         elif choice == 's':
             # Start server
             create_viewer_html()
             start_local_server()
-            clear_screen()
-            print_header()
+            redraw_screen()
             
         elif choice == 't':
             # Tool status
@@ -988,9 +1394,10 @@ def main():
             print(f"  verilator: {'✅ Installed' if tools['verilator'] else '❌ Not found'}")
             print(f"  g++:       {'✅ Installed' if tools['g++'] else '❌ Not found'}")
             print(f"  Pillow:    {'✅ Installed' if tools['pillow'] else '❌ Not found'}")
+            print(f"  threads:   {SIM_THREADS} for runs of {THREADS_MIN_FRAMES}+ frames "
+                  f"(slow-clocked designs can run slower threaded; override with --threads N)")
             input("\nPress Enter to continue...")
-            clear_screen()
-            print_header()
+            redraw_screen()
             
         elif choice == 'q':
             print("\n👋 Goodbye!")
@@ -999,14 +1406,31 @@ def main():
         else:
             print("\n❌ Invalid choice. Please try again.")
             time.sleep(1)
-            clear_screen()
-            print_header()
+            redraw_screen()
 
 
 if __name__ == '__main__':
     # Initialize PATH at startup
     check_tools()
     
+    if '--threads' in sys.argv:
+        i = sys.argv.index('--threads')
+        try:
+            SIM_THREADS = max(1, int(sys.argv[i + 1]))
+            THREADS_MIN_FRAMES = 0
+            del sys.argv[i:i + 2]
+        except (IndexError, ValueError):
+            print("Usage: --threads N (number of Verilator model threads)")
+            sys.exit(1)
+    
+    if '--gif-only' in sys.argv:
+        sys.argv.remove('--gif-only')
+        GIF_ONLY = True
+    
+    if '--pipe' in sys.argv:
+        sys.argv.remove('--pipe')
+        PIPE_MODE = True
+    
     # Check if running with command-line args for backward compatibility
     if len(sys.argv) > 1:
         if sys.argv[1] == 'sim':
@@ -1029,6 +1453,8 @@ if __name__ == '__main__':
             run_full_simulation('kirby', 30)
         elif sys.argv[1] == 'quickkirby':
             run_full_simulation('kirby', 5)
+        elif sys.argv[1] == 'prebuild':
+            prebuild_all()
         elif sys.argv[1] == 'server':
             create_viewer_html()
             start_local_server()
@@ -1038,7 +1464,7 @@ if __name__ == '__main__':
             for tool, status in tools.items():
                 print(f"  {tool}: {'✅' if status else '❌'}")
         else:
-            print("Usage: python run_verilator.py [sim|floor|coin|server|check]")
+            print("Usage: python run_verilator.py [sim|floor|coin|prebuild|server|check] [--gif-only] [--pipe] [--threads N]")
             print("Or run without arguments for interactive menu")
     else:
         main()
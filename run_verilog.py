@@ -3,11 +3,12 @@
 VGA Sphere Verilog Simulation Runner
 =====================================
 
-This script builds and runs the actual Verilog simulation using Icarus Verilog,
-then captures VGA frames from the simulation output.
+This script builds and runs the actual Verilog simulation using Icarus Verilog
+(or Verilator with --verilator), then captures VGA frames from the simulation output.
 
 Prerequisites:
 - Icarus Verilog (iverilog, vvp): http://bleyer.org/icarus/
+- Or Verilator 4.x+ and a C++ compiler for --verilator
 - Python 3.8+
 - Pillow (pip install Pillow)
 
@@ -17,6 +18,8 @@ Usage:
     python run_verilog.py --build      # Build the Verilog simulation
     python run_verilog.py --run        # Run simulation and capture frames
     python run_verilog.py              # Do all of the above
+    python run_verilog.py --verilator  # Do all of the above with Verilator
+    python run_verilog.py --force-rebuild  # Rebuild even if sources are unchanged
 """
 
 import os
@@ -24,8 +27,13 @@ import sys
 import subprocess
 import shutil
 import argparse
+import functools
+import hashlib
 import struct
 import time
+import mmap
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 
 # Paths
 PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -33,6 +41,8 @@ SRC_DIR = os.path.join(PROJECT_DIR, 'src')
 TEST_DIR = os.path.join(PROJECT_DIR, 'test')
 OUTPUT_DIR = os.path.join(PROJECT_DIR, 'output')
 BUILD_DIR = os.path.join(PROJECT_DIR, 'build')
+VERILATOR_DIR = os.path.join(BUILD_DIR, 'obj_verilator')
+VERILATOR_EXE = os.path.join(VERILATOR_DIR, 'Vvgasphere.exe' if sys.platform == 'win32' else 'Vvgasphere')
 
 # VGA timing
 H_DISPLAY = 640
@@ -40,6 +50,14 @@ H_TOTAL = 800
 V_DISPLAY = 480
 V_TOTAL = 525
 
+# The DUT drives 2 bits per channel, so every frame uses at most these 64 colours;
+# the capture stores one {2'b00, r, g, b} index byte per pixel into this palette
+EXPAND_2BIT = (0, 85, 170, 255)
+PALETTE_6BIT = [EXPAND_2BIT[(v >> shift) & 3] for v in range(64) for shift in (4, 2, 0)]
+
+# zlib level for the per-frame PNGs: 1 is several times faster than Pillow's default 6
+PNG_COMPRESS_LEVEL = 1
+
 # Verilog source files for sphere renderer
 SPHERE_SOURCES = [
     'vgasphere.v',
@@ -51,6 +69,7 @@ SPHERE_SOURCES = [
 ]
 
 
+@functools.lru_cache(maxsize=None)
 def check_tool(name, test_arg='--version'):
     """Check if a tool is installed and return its path"""
     path = shutil.which(name)
@@ -63,15 +82,22 @@ def check_tool(name, test_arg='--version'):
     return None
 
 
-def check_tools():
+def check_tools(verilator=False):
     """Check all required tools"""
     print("=== Checking Required Tools ===\n")
     
-    tools = {
-        'iverilog': ('Icarus Verilog compiler', 'Required'),
-        'vvp': ('Icarus Verilog simulator', 'Required'),
-        'gtkwave': ('Waveform viewer', 'Optional'),
-    }
+    if verilator:
+        tools = {
+            'verilator': ('Verilator compiler', 'Required'),
+            'g++': ('C++ compiler', 'Required'),
+            'gtkwave': ('Waveform viewer', 'Optional'),
+        }
+    else:
+        tools = {
+            'iverilog': ('Icarus Verilog compiler', 'Required'),
+            'vvp': ('Icarus Verilog simulator', 'Required'),
+            'gtkwave': ('Waveform viewer', 'Optional'),
+        }
     
     all_ok = True
     for tool, (desc, req) in tools.items():
@@ -149,6 +175,9 @@ module tb_vgasphere_capture;
     integer h_count, v_count, frame_count;
     integer pixel_file;
     
+    // One visible line of packed 00RRGGBB pixel bytes, pixel k in bits [8k+7:8k]
+    reg [H_DISPLAY*8-1:0] line_buf;
+    
     // Instantiate DUT
     vgasphere dut (
         .clk(clk),
@@ -191,13 +220,15 @@ module tb_vgasphere_capture;
         while (frame_count < NUM_FRAMES) begin
             @(posedge clk);
             
-            // Write pixel if in visible area
+            // Buffer pixel if in visible area
             if (h_count < H_DISPLAY && v_count < V_DISPLAY) begin
-                // Write R, G, B as bytes (2-bit extended to 8-bit)
-                $fwrite(pixel_file, "%c%c%c", 
-                    {r_out, r_out, r_out, r_out},
-                    {g_out, g_out, g_out, g_out},
-                    {b_out, b_out, b_out, b_out});
+                // One byte per pixel; the runner expands it through PALETTE_6BIT
+                line_buf[h_count*8 +: 8] = {2'b00, r_out, g_out, b_out};
+                
+                // Write the whole line at once: %u emits raw 32-bit words, least
+                // significant word first, so the bytes land in buffer order
+                if (h_count == H_DISPLAY - 1)
+                    $fwrite(pixel_file, "%u", line_buf);
             end
             
             // Update counters
@@ -229,7 +260,26 @@ endmodule
     return tb_path
 
 
-def build_simulation():
+def build_digest(paths, cmd):
+    """SHA-256 over the contents of the build inputs and the build command"""
+    h = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    h.update('\0'.join(cmd).encode())
+    return h.hexdigest()
+
+
+def build_is_current(output_file, digest):
+    """True if output_file exists and was built from inputs with this digest"""
+    try:
+        with open(output_file + '.hash') as f:
+            return os.path.exists(output_file) and f.read().strip() == digest
+    except OSError:
+        return False
+
+
+def build_simulation(force=False):
     """Build the Verilog simulation"""
     print("\n=== Building Verilog Simulation ===\n")
     
@@ -238,36 +288,188 @@ def build_simulation():
     # Create testbench
     tb_path = create_verilog_testbench()
     
+    # Check all source files exist with a single directory read, reporting every missing one
+    with os.scandir(SRC_DIR) as it:
+        src_files = {e.name for e in it if e.is_file()}
+    missing = [f for f in SPHERE_SOURCES if f not in src_files]
+    if missing:
+        for f in missing:
+            print(f"ERROR: Source file not found: {os.path.join(SRC_DIR, f)}")
+        return False
+    
     # Collect source files
     sources = [os.path.join(SRC_DIR, f) for f in SPHERE_SOURCES]
     sources.append(tb_path)
     
-    # Check all files exist
-    for src in sources:
-        if not os.path.exists(src):
-            print(f"ERROR: Source file not found: {src}")
-            return False
-    
     # Build with iverilog
     output_file = os.path.join(BUILD_DIR, 'vgasphere.vvp')
     cmd = ['iverilog', '-o', output_file, '-I', SRC_DIR] + sources
     
+    # Skip the compile when neither the sources nor the command changed since the last build
+    digest = build_digest(sources, cmd)
+    if not force and build_is_current(output_file, digest):
+        print(f"Sources unchanged, reusing: {output_file}")
+        return True
+    
     print(f"Running: {' '.join(cmd)}")
-    result = subprocess.run(cmd, capture_output=True, text=True)
     
-    if result.returncode != 0:
+    # Stream compiler messages as they arrive; keep the last few to repeat if the build fails
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    tail = deque(maxlen=20)
+    for raw_line in proc.stdout:
+        line = raw_line.decode('utf-8', 'replace')
+        sys.stdout.write(line)
+        tail.append(line)
+    
+    if proc.wait() != 0:
         print("BUILD FAILED!")
-        print(result.stderr)
+        if tail:
+            print("Last output:")
+            print(''.join(tail), end='')
         return False
     
-    if result.stderr:
-        print("Warnings:")
-        print(result.stderr)
-    
+    with open(output_file + '.hash', 'w') as f:
+        f.write(digest)
     print(f"Build successful: {output_file}")
     return True
 
 
+def create_verilator_harness():
+    """Create the C++ main that drives the Verilated model and writes VGA data to a file"""
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    
+    cpp_content = '''// Verilator harness for VGA Sphere - outputs pixel data to file
+#include "Vvgasphere.h"
+#include "verilated.h"
+#include <cstdint>
+#include <cstdio>
+#include <vector>
+
+const int H_DISPLAY = 640;
+const int H_TOTAL = 800;
+const int V_DISPLAY = 480;
+const int V_TOTAL = 525;
+const int NUM_FRAMES = 40;
+
+int main(int argc, char** argv) {
+    Verilated::commandArgs(argc, argv);
+    Vvgasphere* dut = new Vvgasphere;
+    
+    FILE* pixel_file = fopen("vga_output.raw", "wb");
+    if (!pixel_file) {
+        printf("ERROR: Could not open output file\\n");
+        return 1;
+    }
+    
+    // One frame of packed 00RRGGBB pixel bytes, written with a single fwrite
+    std::vector<uint8_t> frame(H_DISPLAY * V_DISPLAY);
+    
+    // Evaluate both clock edges; Verilator detects posedge against the previous eval
+    auto tick = [&]() {
+        dut->clk = 0;
+        dut->eval();
+        dut->clk = 1;
+        dut->eval();
+    };
+    
+    // Reset
+    dut->rst_n = 0;
+    for (int i = 0; i < 3; i++) tick();
+    dut->rst_n = 1;
+    printf("Starting VGA capture simulation...\\n");
+    printf("Capturing %d frames at %dx%d\\n", NUM_FRAMES, H_DISPLAY, V_DISPLAY);
+    
+    for (int frame_count = 0; frame_count < NUM_FRAMES; frame_count++) {
+        uint8_t* px = frame.data();
+        for (int v_count = 0; v_count < V_TOTAL; v_count++) {
+            for (int h_count = 0; h_count < H_TOTAL; h_count++) {
+                tick();
+                
+                // Store pixel if in visible area
+                if (h_count < H_DISPLAY && v_count < V_DISPLAY)
+                    *px++ = (dut->r_out << 4) | (dut->g_out << 2) | dut->b_out;
+            }
+        }
+        fwrite(frame.data(), 1, frame.size(), pixel_file);
+        printf("Frame %d/%d complete\\n", frame_count + 1, NUM_FRAMES);
+        fflush(stdout);
+    }
+    
+    fclose(pixel_file);
+    printf("Simulation complete! Output written to vga_output.raw\\n");
+    dut->final();
+    delete dut;
+    return 0;
+}
+'''
+    
+    cpp_path = os.path.join(BUILD_DIR, 'sim_main.cpp')
+    with open(cpp_path, 'w') as f:
+        f.write(cpp_content)
+    
+    print(f"Created harness: {cpp_path}")
+    return cpp_path
+
+
+def build_simulation_verilator(force=False):
+    """Build the Verilog simulation with Verilator"""
+    print("\n=== Building Verilog Simulation (Verilator) ===\n")
+    
+    os.makedirs(BUILD_DIR, exist_ok=True)
+    
+    # Create C++ harness
+    cpp_path = create_verilator_harness()
+    
+    # Check all source files exist with a single directory read, reporting every missing one
+    with os.scandir(SRC_DIR) as it:
+        src_files = {e.name for e in it if e.is_file()}
+    missing = [f for f in SPHERE_SOURCES if f not in src_files]
+    if missing:
+        for f in missing:
+            print(f"ERROR: Source file not found: {os.path.join(SRC_DIR, f)}")
+        return False
+    
+    sources = [os.path.join(SRC_DIR, f) for f in SPHERE_SOURCES]
+    
+    # Compile to C++ and build the executable in one step
+    cmd = ['verilator', '--cc', '--exe', '--build', '-O3',
+           '--x-assign', 'fast', '--x-initial', 'fast', '--noassert',
+           '--top-module', 'vgasphere', '-Wno-fatal', f'-I{SRC_DIR}',
+           '--Mdir', VERILATOR_DIR, '-j', '0'] + sources + [cpp_path]
+    
+    digest = build_digest(sources + [cpp_path], cmd)
+    if not force and build_is_current(VERILATOR_EXE, digest):
+        print(f"Sources unchanged, reusing: {VERILATOR_EXE}")
+        return True
+    
+    # Route the C++ compiles through ccache when it is installed
+    ccache = shutil.which('ccache')
+    if ccache:
+        cmd[1:1] = ['-MAKEFLAGS', f'OBJCACHE={ccache}']
+    
+    print(f"Running: {' '.join(cmd)}")
+    
+    # Stream compiler messages as they arrive; keep the last few to repeat if the build fails
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    tail = deque(maxlen=20)
+    for raw_line in proc.stdout:
+        line = raw_line.decode('utf-8', 'replace')
+        sys.stdout.write(line)
+        tail.append(line)
+    
+    if proc.wait() != 0:
+        print("BUILD FAILED!")
+        if tail:
+            print("Last output:")
+            print(''.join(tail), end='')
+        return False
+    
+    with open(VERILATOR_EXE + '.hash', 'w') as f:
+        f.write(digest)
+    print(f"Build successful: {VERILATOR_EXE}")
+    return True
+
+
 def run_simulation():
     """Run the Verilog simulation"""
     print("\n=== Running Verilog Simulation ===\n")
@@ -287,14 +489,15 @@ def run_simulation():
         print("This may take a few minutes...")
         
         start_time = time.time()
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        # Stream the testbench's per-frame $display lines as they happen instead of after exit
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        for raw_line in proc.stdout:
+            sys.stdout.write(raw_line.decode('utf-8', 'replace'))
+            sys.stdout.flush()
+        returncode = proc.wait()
         elapsed = time.time() - start_time
         
-        print(result.stdout)
-        if result.stderr:
-            print(result.stderr)
-        
-        if result.returncode != 0:
+        if returncode != 0:
             print("SIMULATION FAILED!")
             return False
         
@@ -305,6 +508,45 @@ def run_simulation():
         os.chdir(old_cwd)
 
 
+def run_simulation_verilator():
+    """Run the Verilated simulation"""
+    print("\n=== Running Verilog Simulation (Verilator) ===\n")
+    
+    if not os.path.exists(VERILATOR_EXE):
+        print("ERROR: Simulation not built. Run with --build --verilator first.")
+        return False
+    
+    # Runs in the build directory so vga_output.raw lands where convert_raw_to_frames looks
+    cmd = [VERILATOR_EXE]
+    print(f"Running: {' '.join(cmd)}")
+    
+    start_time = time.time()
+    result = subprocess.run(cmd, cwd=BUILD_DIR)
+    elapsed = time.time() - start_time
+    
+    if result.returncode != 0:
+        print("SIMULATION FAILED!")
+        return False
+    
+    print(f"\nSimulation completed in {elapsed:.1f} seconds")
+    return True
+
+
+def save_frame_png(job):
+    """Save one frame of the raw output as PNG (runs in a worker process)"""
+    from PIL import Image
+    raw_file, index, filename = job
+    frame_size = H_DISPLAY * V_DISPLAY
+    # Workers read their own frame so no pixel data is pickled through the pool
+    with open(raw_file, 'rb') as f:
+        f.seek(index * frame_size)
+        frame_data = f.read(frame_size)
+    img = Image.frombytes('P', (H_DISPLAY, V_DISPLAY), frame_data)
+    img.putpalette(PALETTE_6BIT)
+    img.save(filename, optimize=False, compress_level=PNG_COMPRESS_LEVEL)
+    return filename
+
+
 def convert_raw_to_frames():
     """Convert raw VGA output to PNG frames"""
     print("\n=== Converting to PNG Frames ===\n")
@@ -322,37 +564,40 @@ def convert_raw_to_frames():
     
     os.makedirs(OUTPUT_DIR, exist_ok=True)
     
-    # Read raw file
-    with open(raw_file, 'rb') as f:
-        data = f.read()
-    
-    frame_size = H_DISPLAY * V_DISPLAY * 3
-    num_frames = len(data) // frame_size
+    frame_size = H_DISPLAY * V_DISPLAY
+    num_frames = os.path.getsize(raw_file) // frame_size
     
     print(f"Found {num_frames} frames in raw data")
     
-    images = []
-    for i in range(num_frames):
-        start = i * frame_size
-        end = start + frame_size
-        frame_data = data[start:end]
-        
-        img = Image.frombytes('RGB', (H_DISPLAY, V_DISPLAY), frame_data)
-        filename = os.path.join(OUTPUT_DIR, f'frame_{i:04d}.png')
-        img.save(filename)
-        images.append(img)
-        print(f"  Saved frame {i}: {filename}")
+    # PNG encoding is independent per frame, so spread it over all cores
+    frame_prefix = os.path.join(OUTPUT_DIR, 'frame_')
+    jobs = [(raw_file, i, f'{frame_prefix}{i:04d}.png') for i in range(num_frames)]
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as pool:
+        for i, filename in enumerate(pool.map(save_frame_png, jobs)):
+            print(f"  Saved frame {i}: {filename}")
     
     # Create GIF
-    if images:
+    if num_frames:
         gif_path = os.path.join(OUTPUT_DIR, 'sphere_verilog.gif')
-        images[0].save(
-            gif_path,
-            save_all=True,
-            append_images=images[1:],
-            duration=50,
-            loop=0
-        )
+        
+        def paletted(view):
+            # Pixels are already indices into the fixed 64-colour palette: no quantize pass
+            img = Image.frombuffer('P', (H_DISPLAY, V_DISPLAY), view, 'raw', 'P', 0, 1)
+            img.putpalette(PALETTE_6BIT)
+            return img
+        
+        # Map the raw file rather than reading it; only the frame being encoded is paged in,
+        # and frombuffer wraps each memoryview slice without copying it
+        with open(raw_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data, \
+                memoryview(data) as mv:
+            images = (paletted(mv[i * frame_size:(i + 1) * frame_size]) for i in range(num_frames))
+            next(images).save(
+                gif_path,
+                save_all=True,
+                append_images=images,
+                duration=50,
+                loop=0
+            )
         print(f"\nCreated GIF: {gif_path}")
     
     return True
@@ -365,6 +610,8 @@ def main():
     parser.add_argument('--build', action='store_true', help='Build the simulation')
     parser.add_argument('--run', action='store_true', help='Run simulation')
     parser.add_argument('--convert', action='store_true', help='Convert raw output to frames')
+    parser.add_argument('--force-rebuild', action='store_true', help='Rebuild even if sources are unchanged')
+    parser.add_argument('--verilator', action='store_true', help='Build and run with Verilator instead of Icarus')
     args = parser.parse_args()
     
     print("=" * 50)
@@ -379,7 +626,7 @@ def main():
         return
     
     if args.check or do_all:
-        if not check_tools():
+        if not check_tools(args.verilator):
             print("\n[!!] Some required tools are missing.")
             print("     Run: python run_verilog.py --install")
             if do_all:
@@ -387,12 +634,14 @@ def main():
             return
     
     if args.build or do_all:
-        if not build_simulation():
+        build = build_simulation_verilator if args.verilator else build_simulation
+        if not build(force=args.force_rebuild):
             print("\n[!!] Build failed!")
             sys.exit(1)
     
     if args.run or do_all:
-        if not run_simulation():
+        run = run_simulation_verilator if args.verilator else run_simulation
+        if not run():
             print("\n[!!] Simulation failed!")
             sys.exit(1)
     
@@ -7,17 +7,24 @@ This script emulates the Verilog ray marching algorithm in Python,
 generating the same frames that the hardware would produce.
 
 No Verilog simulator required - just Python + Pillow.
+NumPy is used when installed to render whole frames at once, and Numba
+(if also installed) compiles the per-pixel march to parallel native code.
 
 Usage:
     python sphere_raymarcher.py           # Generate 60 frames
     python sphere_raymarcher.py --frames 10  # Generate 10 frames
     python sphere_raymarcher.py --gif     # Also create animated GIF
+    python sphere_raymarcher.py --video   # Encode sphere.mp4 with ffmpeg, no PNG frames
 """
 
 import os
 import sys
 import math
+import shutil
+import subprocess
 import argparse
+import functools
+from concurrent.futures import ThreadPoolExecutor
 
 # Try to import PIL
 try:
@@ -27,6 +34,20 @@ except ImportError:
     print("Pillow not installed. Install with: pip install Pillow")
     sys.exit(1)
 
+# NumPy is optional: with it every pixel marches in lock-step as one array
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+# Numba is optional too: it compiles the march below into a multi-threaded kernel
+try:
+    from numba import njit, prange
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 # Screen dimensions
 WIDTH = 640
 HEIGHT = 480
@@ -37,6 +58,9 @@ SPHERE_RADIUS = 1.5
 # Camera distance from origin
 CAMERA_DISTANCE = 4.0
 
+# zlib level for the frame PNGs: 1 is several times faster than Pillow's default 6
+PNG_COMPRESS_LEVEL = 1
+
 
 def normalize(v):
     """Normalize a 3D vector"""
@@ -59,40 +83,182 @@ def sphere_sdf(p, center, radius):
     return math.sqrt(dx*dx + dy*dy + dz*dz) - radius
 
 
-def ray_march(ray_origin, ray_dir, max_steps=64, max_dist=20.0):
+def ray_march(ray_origin, ray_dir, max_steps=8, max_dist=20.0):
     """
     Ray march to find intersection with sphere at origin
     Returns (hit, distance, position)
     """
-    t = 0.0
+    # Plain float locals: no per-step list allocation or generator sums
+    ox, oy, oz = ray_origin
+    dx, dy, dz = ray_dir
+    radius = SPHERE_RADIUS
+    
+    # Analytic test against a bounding sphere (radius + hit threshold): rays that
+    # miss it can never get within 0.001 of the surface, so skip the march
+    b = dx * ox + dy * oy + dz * oz
+    disc = b * b - (ox*ox + oy*oy + oz*oz - (radius + 0.001) ** 2)
+    if disc < 0:
+        return False, 0.0, (ox, oy, oz)
+    
+    # Start at the bounding-sphere entry point; a few SDF steps settle onto the surface
+    t = max(0.0, -b - math.sqrt(disc))
     
     for _ in range(max_steps):
         # Current position along ray
-        p = [ray_origin[i] + ray_dir[i] * t for i in range(3)]
+        px = ox + dx * t
+        py = oy + dy * t
+        pz = oz + dz * t
         
         # Distance to sphere at origin
-        dist = sphere_sdf(p, [0, 0, 0], SPHERE_RADIUS)
+        dist = math.sqrt(px*px + py*py + pz*pz) - radius
         
         # Hit check
         if dist < 0.001:
-            return True, t, p
+            return True, t, (px, py, pz)
         
         # Miss check
         if t > max_dist:
-            return False, t, p
+            return False, t, (px, py, pz)
         
         # Step forward
         t += dist
     
-    return False, t, [ray_origin[i] + ray_dir[i] * t for i in range(3)]
+    return False, t, (ox + dx * t, oy + dy * t, oz + dz * t)
+
+
+if HAS_NUMBA:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _render_kernel(out, camera, forward, right, up, light, radius, aspect, fov, max_steps, max_dist):
+        """Per-pixel ray march writing RGB into out; rows run in parallel, each ray stays in registers"""
+        height, width = out.shape[0], out.shape[1]
+        for y in prange(height):
+            v = (1.0 - 2.0 * y / height) * fov
+            for x in range(width):
+                u = (2.0 * x / width - 1.0) * aspect * fov
+                
+                # Ray direction in world space
+                dx = forward[0] + right[0] * u + up[0] * v
+                dy = forward[1] + right[1] * u + up[1] * v
+                dz = forward[2] + right[2] * u + up[2] * v
+                length = np.sqrt(dx * dx + dy * dy + dz * dz)
+                dx /= length
+                dy /= length
+                dz /= length
+                
+                # Bounding-sphere test; misses skip the march entirely
+                b = dx * camera[0] + dy * camera[1] + dz * camera[2]
+                disc = b * b - (camera[0] * camera[0] + camera[1] * camera[1] + camera[2] * camera[2]
+                                - (radius + 0.001) ** 2)
+                
+                # Ray march against the sphere at origin, from the bounding-sphere entry
+                t = max(0.0, -b - np.sqrt(max(disc, 0.0)))
+                hit = False
+                px = py = pz = 0.0
+                for _ in range(max_steps if disc >= 0 else 0):
+                    px = camera[0] + dx * t
+                    py = camera[1] + dy * t
+                    pz = camera[2] + dz * t
+                    dist = np.sqrt(px * px + py * py + pz * pz) - radius
+                    if dist < 0.001:
+                        hit = True
+                        break
+                    if t > max_dist:
+                        break
+                    t += dist
+                
+                if hit:
+                    length = np.sqrt(px * px + py * py + pz * pz)
+                    diffuse = max(0.0, (px * light[0] + py * light[1] + pz * light[2]) / length)
+                    luma = min(1.0, 0.15 + diffuse * 0.85) ** 0.9
+                    out[y, x, 0] = int(min(255.0, luma * 255 + 50))
+                    out[y, x, 1] = int(min(255.0, luma * 180 + 30))
+                    out[y, x, 2] = int(min(255.0, luma * 100 + 20))
+                else:
+                    sky = y / height
+                    out[y, x, 0] = int(20 + sky * 15)
+                    out[y, x, 1] = int(30 + sky * 20)
+                    out[y, x, 2] = int(80 + sky * 40)
+
+
+def render_frame_numba(camera, forward, right, up, light, aspect, fov, max_steps=8, max_dist=20.0):
+    """
+    Compiled render_frame: one native thread per row block, no per-step temporaries
+    Returns RGB pixel bytes
+    """
+    out = np.empty((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    _render_kernel(out, np.asarray(camera, dtype=np.float64), np.asarray(forward, dtype=np.float64),
+                   np.asarray(right, dtype=np.float64), np.asarray(up, dtype=np.float64),
+                   np.asarray(light, dtype=np.float64), SPHERE_RADIUS, aspect, fov, max_steps, max_dist)
+    return out.tobytes()
+
+
+@functools.lru_cache(maxsize=None)
+def screen_grid(aspect, fov):
+    """
+    Per-pixel screen coordinates (u, v) as (HEIGHT, WIDTH) arrays
+    They only depend on the resolution and lens, so every frame shares one copy
+    """
+    u = (2.0 * np.arange(WIDTH) / WIDTH - 1.0) * aspect * fov
+    v = (1.0 - 2.0 * np.arange(HEIGHT) / HEIGHT) * fov
+    u, v = np.meshgrid(u, v)
+    u.setflags(write=False)
+    v.setflags(write=False)
+    return u, v
+
+
+def render_frame_numpy(camera, forward, right, up, light, aspect, fov, max_steps=8, max_dist=20.0):
+    """
+    Vectorized render_frame: the same ray march, run on every pixel at once
+    Returns RGB pixel bytes
+    """
+    # Normalized screen coordinates (-1 to 1) for every pixel
+    u, v = screen_grid(aspect, fov)
+    
+    # Ray directions in world space, shape (HEIGHT, WIDTH, 3)
+    ray_dir = (np.asarray(forward)[None, None, :]
+               + np.asarray(right) * u[..., None]
+               + np.asarray(up) * v[..., None])
+    ray_dir /= np.linalg.norm(ray_dir, axis=-1, keepdims=True)
+    camera = np.asarray(camera)
+    
+    # Bounding-sphere test: rays that miss it are never marched
+    b = (ray_dir * camera).sum(-1)
+    disc = b * b - ((camera * camera).sum() - (SPHERE_RADIUS + 0.001) ** 2)
+    
+    # Ray march from the bounding-sphere entry: rays drop out of the active mask
+    # once they hit or pass max_dist
+    t = np.maximum(0.0, -b - np.sqrt(np.maximum(disc, 0.0)))
+    hit = np.zeros((HEIGHT, WIDTH), dtype=bool)
+    active = disc >= 0
+    for _ in range(max_steps):
+        p = camera + ray_dir * t[..., None]
+        dist = np.sqrt((p * p).sum(-1)) - SPHERE_RADIUS
+        hit |= active & (dist < 0.001)
+        active &= (dist >= 0.001) & (t <= max_dist)
+        if not active.any():
+            break
+        t += np.where(active, dist, 0.0)
+    
+    # Diffuse + ambient lighting (normal of a sphere at origin is the normalized position)
+    pos = camera + ray_dir * t[..., None]
+    normal = pos / np.linalg.norm(pos, axis=-1, keepdims=True)
+    diffuse = np.maximum(0, (normal * np.asarray(light)).sum(-1))
+    luma = np.minimum(1.0, 0.15 + diffuse * 0.85) ** 0.9
+    
+    # Warm orange-gold sphere over the sky gradient background
+    sky = (np.arange(HEIGHT) / HEIGHT)[:, None]
+    r = np.where(hit, np.minimum(255, luma * 255 + 50), 20 + sky * 15)
+    g = np.where(hit, np.minimum(255, luma * 180 + 30), 30 + sky * 20)
+    b = np.where(hit, np.minimum(255, luma * 100 + 20), 80 + sky * 40)
+    return np.dstack([r, g, b]).astype(np.uint8).tobytes()
 
 
 def render_frame(angle):
     """
     Render a single frame with the camera orbiting around the sphere
-    Returns list of RGB pixels
+    Returns RGB pixel bytes
     """
-    pixels = []
+    pixels = bytearray()
     
     # Camera orbiting around the sphere
     cam_x = math.sin(angle) * CAMERA_DISTANCE
@@ -116,28 +282,47 @@ def render_frame(angle):
     aspect = WIDTH / HEIGHT
     fov = 1.0  # Field of view factor
     
+    if HAS_NUMBA:
+        return render_frame_numba(camera, forward, right, up, light, aspect, fov)
+    if HAS_NUMPY:
+        return render_frame_numpy(camera, forward, right, up, light, aspect, fov)
+    
+    # Unpack the basis into floats and hoist everything that doesn't change per pixel
+    fx, fy, fz = forward
+    rx, ry, rz = right
+    ux, uy, uz = up
+    lx, ly, lz = light
+    us = [(2.0 * x / WIDTH - 1.0) * aspect * fov for x in range(WIDTH)]
+    
     for y in range(HEIGHT):
-        for x in range(WIDTH):
-            # Normalized screen coordinates (-1 to 1)
-            u = (2.0 * x / WIDTH - 1.0) * aspect * fov
-            v = (1.0 - 2.0 * y / HEIGHT) * fov
-            
+        # Normalized screen coordinates (-1 to 1)
+        v = (1.0 - 2.0 * y / HEIGHT) * fov
+        
+        # Sky gradient background for this row
+        t = y / HEIGHT
+        sky = bytes((int(20 + t * 15), int(30 + t * 20), int(80 + t * 40)))
+        
+        for u in us:
             # Ray direction in world space
-            ray_dir = normalize([
-                forward[0] + right[0] * u + up[0] * v,
-                forward[1] + right[1] * u + up[1] * v,
-                forward[2] + right[2] * u + up[2] * v
-            ])
+            dx = fx + rx * u + ux * v
+            dy = fy + ry * u + uy * v
+            dz = fz + rz * u + uz * v
+            length = math.sqrt(dx*dx + dy*dy + dz*dz)
+            if length < 0.0001:
+                dx, dy, dz = 0, 0, 1
+            else:
+                dx, dy, dz = dx / length, dy / length, dz / length
             
             # Ray march
-            hit, dist, pos = ray_march(camera, ray_dir)
+            hit, dist, (px, py, pz) = ray_march(camera, (dx, dy, dz))
             
             if hit:
                 # Surface normal (for sphere at origin, it's just normalized position)
-                normal = normalize(pos)
+                length = math.sqrt(px*px + py*py + pz*pz)
+                nx, ny, nz = px / length, py / length, pz / length
                 
                 # Diffuse lighting
-                diffuse = max(0, dot(normal, light))
+                diffuse = max(0, nx * lx + ny * ly + nz * lz)
                 
                 # Add some ambient
                 ambient = 0.15
@@ -151,14 +336,9 @@ def render_frame(angle):
                 r = int(min(255, luma * 255 + 50))
                 g = int(min(255, luma * 180 + 30))
                 b = int(min(255, luma * 100 + 20))
+                pixels += bytes((r, g, b))
             else:
-                # Sky gradient background
-                t = y / HEIGHT
-                r = int(20 + t * 15)
-                g = int(30 + t * 20)
-                b = int(80 + t * 40)
-            
-            pixels.extend([r, g, b])
+                pixels += sky
     
     return pixels
 
@@ -168,16 +348,36 @@ def main():
     parser.add_argument('--frames', type=int, default=60, help='Number of frames')
     parser.add_argument('--gif', action='store_true', help='Create animated GIF')
     parser.add_argument('--output', default='output', help='Output directory')
+    parser.add_argument('--video', action='store_true', help='Pipe frames to ffmpeg for an MP4 instead of PNG frames')
     args = parser.parse_args()
     
     os.makedirs(args.output, exist_ok=True)
     
+    # ffmpeg reads raw RGB frames from a pipe, so no per-frame PNG is ever encoded
+    video = None
+    if args.video:
+        if shutil.which('ffmpeg'):
+            video_path = os.path.join(args.output, 'sphere.mp4')
+            video = subprocess.Popen(
+                ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                 '-s', f'{WIDTH}x{HEIGHT}', '-r', '20', '-i', '-',
+                 '-c:v', 'libx264', '-crf', '18', '-pix_fmt', 'yuv420p', video_path],
+                stdin=subprocess.PIPE)
+        else:
+            print("ffmpeg not found, writing PNG frames instead")
+    
     print(f"Rendering {args.frames} frames...")
     print(f"Output directory: {args.output}")
     print()
     
     images = []
     
+    # Pillow releases the GIL while deflating, so PNGs are written in the background
+    # while the next frame renders
+    pool = ThreadPoolExecutor(max_workers=os.cpu_count())
+    saves = []
+    frame_prefix = os.path.join(args.output, 'frame_')
+    
     for frame in range(args.frames):
         # Camera rotation angle
         angle = frame * (2 * math.pi / args.frames)  # Full rotation over all frames
@@ -187,31 +387,55 @@ def main():
         pixels = render_frame(angle)
         
         # Create image
-        img = Image.frombytes('RGB', (WIDTH, HEIGHT), bytes(pixels))
+        img = Image.frombytes('RGB', (WIDTH, HEIGHT), pixels)
         
         # Save frame
-        filename = os.path.join(args.output, f'frame_{frame:04d}.png')
-        img.save(filename)
+        if video:
+            video.stdin.write(pixels)
+        else:
+            filename = f'{frame_prefix}{frame:04d}.png'
+            saves.append(pool.submit(img.save, filename, optimize=False, compress_level=PNG_COMPRESS_LEVEL))
         print(" done")
         
         if args.gif:
             images.append(img)
     
-    print(f"\nSaved {args.frames} frames to {args.output}/")
+    for save in saves:
+        save.result()
+    
+    if video:
+        video.stdin.close()
+        if video.wait() != 0:
+            print("ffmpeg failed to encode the video")
+            sys.exit(1)
+        print(f"\nSaved {args.frames} frames to {video_path}")
+    else:
+        print(f"\nSaved {args.frames} frames to {args.output}/")
     
     # Create GIF
     if args.gif and images:
         gif_path = os.path.join(args.output, 'sphere.gif')
         print(f"Creating animated GIF: {gif_path}")
-        images[0].save(
+        # One shared palette from the first frame instead of a median cut per frame at save time
+        palette = images[0].quantize(colors=128, method=Image.Quantize.FASTOCTREE)
+        quantized = list(pool.map(lambda img: img.quantize(palette=palette, dither=Image.Dither.NONE), images))
+        quantized[0].save(
             gif_path,
             save_all=True,
-            append_images=images[1:],
+            append_images=quantized[1:],
             duration=50,  # 50ms per frame = 20 fps
-            loop=0
+            loop=0,
+            optimize=False
         )
         print(f"Created {gif_path}")
     
+    pool.shutdown()
+    
+    # The frame viewer steps through PNGs, which video mode doesn't write
+    if video:
+        print(f"\nDone! Open {video_path} to view the animation.")
+        return
+    
     # Create HTML viewer
     viewer_path = os.path.join(args.output, 'viewer.html')
     with open(viewer_path, 'w', encoding='utf-8') as f:
@@ -0,0 +1,69 @@
+// VGA capture harness shared by all scenes (used by run.py with Verilator)
+//   verilator --prefix Vtop ... selects the class name, so the harness never changes
+//   ./sim N                     sets the number of frames to capture
+// Pixels are written to vga_output.raw as one byte each (00RRGGBB).
+
+#include "Vtop.h"
+#include "verilated.h"
+#include <cstdio>
+#include <cstdlib>
+
+const int H_DISPLAY = 640;
+const int H_TOTAL = 800;
+const int V_DISPLAY = 480;
+const int V_TOTAL = 525;
+
+int main(int argc, char** argv) {
+    int num_frames = (argc > 1) ? atoi(argv[1]) : 30;
+    Verilated::commandArgs(argc, argv);
+    Vtop* top = new Vtop;
+
+    FILE* pixel_file = fopen("vga_output.raw", "wb");
+    if (!pixel_file) {
+        printf("ERROR: Could not open output file\n");
+        return 1;
+    }
+
+    printf("Starting VGA capture simulation...\n");
+    printf("Capturing %d frames at %dx%d\n", num_frames, H_DISPLAY, V_DISPLAY);
+
+    top->clk = 0;
+    top->rst_n = 0;
+    for (int i = 0; i < 10; i++) {
+        top->clk = 0; top->eval();
+        top->clk = 1; top->eval();
+    }
+    top->rst_n = 1;
+
+    int h_count = 0, v_count = 0, frame_count = 0;
+    unsigned char line[H_DISPLAY];
+
+    while (frame_count < num_frames) {
+        top->clk = 0; top->eval();
+        top->clk = 1; top->eval();
+
+        if (h_count < H_DISPLAY && v_count < V_DISPLAY) {
+            line[h_count] = ((top->r_out & 3) << 4) | ((top->g_out & 3) << 2) | (top->b_out & 3);
+            if (h_count == H_DISPLAY - 1)
+                fwrite(line, 1, H_DISPLAY, pixel_file);
+        }
+
+        h_count++;
+        if (h_count >= H_TOTAL) {
+            h_count = 0;
+            v_count++;
+            if (v_count >= V_TOTAL) {
+                v_count = 0;
+                frame_count++;
+                printf("Frame %d/%d complete\n", frame_count, num_frames);
+                fflush(stdout);
+            }
+        }
+    }
+
+    fclose(pixel_file);
+    printf("Simulation complete! Output written to vga_output.raw\n");
+    top->final();
+    delete top;
+    return 0;
+}
@@ -0,0 +1,119 @@
+`timescale 1ns / 1ps
+
+// VGA capture testbench shared by all scenes (used by run.py with Icarus)
+//   iverilog -DTOP_MODULE=vga_sphere ...   selects the design under test
+//   vvp sim.vvp +frames=N                  sets the number of frames to capture
+//   vvp sim.vvp +server                    keeps running: reads frame counts from stdin,
+//                                          replies DONE after each capture, exits on 0/EOF
+// Pixels are written to vga_output.raw as one byte each (00RRGGBB), one scanline at a time.
+
+`ifndef TOP_MODULE
+`define TOP_MODULE vga_sphere
+`endif
+
+module tb_capture;
+
+    localparam H_DISPLAY = 640;
+    localparam H_TOTAL = 800;
+    localparam V_DISPLAY = 480;
+    localparam V_TOTAL = 525;
+    localparam STDIN = 32'h8000_0000;
+    
+    reg clk;
+    reg rst_n;
+    
+    wire hsync, vsync;
+    wire [1:0] r_out, g_out, b_out;
+    
+    // Counters sized to the timing constants rather than 32-bit integers
+    reg [9:0] h_count;
+    reg [9:0] v_count;
+    reg [15:0] frame_count;
+    integer num_frames;
+    integer pixel_file;
+    integer scan_count;
+    
+    // One scanline of packed 00RRGGBB pixel bytes
+    reg [H_DISPLAY*8-1:0] line_buf;
+    
+    `TOP_MODULE dut (
+        .clk(clk),
+        .rst_n(rst_n),
+        .hsync(hsync),
+        .vsync(vsync),
+        .r_out(r_out),
+        .g_out(g_out),
+        .b_out(b_out)
+    );
+    
+    initial begin
+        clk = 0;
+        forever #20 clk = ~clk;
+    end
+    
+    // Hold the DUT in reset; release lands on the same clock phase for every capture
+    task reset_dut;
+        begin
+            rst_n = 0;
+            @(posedge clk);
+            #80;
+            rst_n = 1;
+        end
+    endtask
+    
+    task capture_frames;
+        begin
+            pixel_file = $fopen("vga_output.raw", "wb");
+            if (pixel_file == 0) begin
+                $display("ERROR: Could not open output file");
+                $finish;
+            end
+            
+            $display("Starting VGA capture simulation...");
+            $display("Capturing %0d frames at %0dx%0d", num_frames, H_DISPLAY, V_DISPLAY);
+            
+            for (frame_count = 0; frame_count < num_frames; frame_count = frame_count + 1) begin
+                // Active lines: capture the display window, then skip h-blank
+                for (v_count = 0; v_count < V_DISPLAY; v_count = v_count + 1) begin
+                    for (h_count = 0; h_count < H_DISPLAY; h_count = h_count + 1) begin
+                        @(posedge clk);
+                        // Pixel 0 is the lowest byte so %u (LSB first) emits pixels in order
+                        line_buf[h_count*8 +: 8] = {2'b00, r_out, g_out, b_out};
+                    end
+                    $fwrite(pixel_file, "%u", line_buf);
+                    repeat (H_TOTAL - H_DISPLAY) @(posedge clk);
+                end
+                
+                // Vertical blanking: nothing to capture
+                repeat ((V_TOTAL - V_DISPLAY) * H_TOTAL) @(posedge clk);
+                
+                $display("Frame %0d/%0d complete", frame_count + 1, num_frames);
+            end
+            
+            $fclose(pixel_file);
+            $display("Simulation complete! Output written to vga_output.raw");
+        end
+    endtask
+    
+    initial begin
+        if ($test$plusargs("server")) begin
+            // Design stays elaborated between runs; each request restarts from reset
+            forever begin
+                scan_count = $fscanf(STDIN, "%d", num_frames);
+                if (scan_count != 1 || num_frames <= 0)
+                    $finish;
+                reset_dut;
+                capture_frames;
+                $display("DONE");
+                $fflush;
+            end
+        end else begin
+            if (!$value$plusargs("frames=%d", num_frames))
+                num_frames = 30;
+            reset_dut;
+            capture_frames;
+            $finish;
+        end
+    end
+
+endmodule
@@ -22,6 +22,8 @@ st.set_page_config(
 OUTPUT_DIR = Path(__file__).parent / 'output'
 GIFS_DIR = OUTPUT_DIR / 'gifs'
 FRAMES_DIR = OUTPUT_DIR / 'frames'
+THUMBS_DIR = GIFS_DIR / '.thumbs'
+THUMB_SIZE = (320, 240)
 
 # Custom CSS
 st.markdown("""
@@ -45,16 +47,26 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-def get_frame_count(gif_path):
+# Gallery scans are cached across reruns; callers pass the gifs directory mtime so
+# adding or removing a GIF invalidates them straight away
+def gifs_dir_mtime():
+    """Modification time of the gifs directory (0 if it does not exist yet)"""
+    try:
+        return GIFS_DIR.stat().st_mtime_ns
+    except OSError:
+        return 0
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_frame_count(gif_name):
     """Get frame count from corresponding frames directory"""
-    gif_name = gif_path.stem
-    frames_dir = FRAMES_DIR / gif_name
-    if frames_dir.exists():
-        frame_files = list(frames_dir.glob('frame_*.png'))
-        return len(frame_files)
-    return 0
-
-def categorize_gifs():
+    try:
+        with os.scandir(FRAMES_DIR / gif_name) as it:
+            return sum(1 for e in it if e.name.startswith('frame_') and e.name.endswith('.png'))
+    except OSError:
+        return 0
+
+@st.cache_data(ttl=60, show_spinner=False)
+def categorize_gifs(dir_mtime):
     """Categorize GIFs by type"""
     if not GIFS_DIR.exists():
         return {}
@@ -67,9 +79,14 @@ def categorize_gifs():
         'Kirby': []
     }
     
-    for gif_file in GIFS_DIR.glob('*.gif'):
-        if 'latest' in gif_file.name.lower():
+    mtimes = {}
+    with os.scandir(GIFS_DIR) as it:
+        gif_entries = [e for e in it if e.name.endswith('.gif')]
+    for entry in gif_entries:
+        if 'latest' in entry.name.lower():
             continue
+        gif_file = Path(entry.path)
+        mtimes[gif_file] = entry.stat().st_mtime
             
         if 'mario_coin' in gif_file.name.lower() or 'coin' in gif_file.name.lower():
             categories['Mario Coin'].append(gif_file)
@@ -84,11 +101,27 @@ def categorize_gifs():
     
     # Sort by modification time (newest first)
     for category in categories:
-        categories[category].sort(key=lambda x: x.stat().st_mtime, reverse=True)
+        categories[category].sort(key=mtimes.get, reverse=True)
     
     return categories
 
-def get_latest_gifs():
+@st.cache_data(show_spinner=False)
+def thumb_path(gif_path_str, mtime):
+    """Path to a static first-frame thumbnail of a GIF, creating it if needed"""
+    from PIL import Image
+    gif_path = Path(gif_path_str)
+    thumb = THUMBS_DIR / f'{gif_path.stem}.png'
+    # The runner writes thumbnails alongside new GIFs; older GIFs get one on first view
+    if not thumb.exists() or thumb.stat().st_mtime < mtime:
+        THUMBS_DIR.mkdir(exist_ok=True)
+        with Image.open(gif_path) as img:
+            frame = img.convert('RGB')
+        frame.thumbnail(THUMB_SIZE)
+        frame.save(thumb)
+    return str(thumb)
+
+@st.cache_data(ttl=60, show_spinner=False)
+def get_latest_gifs(dir_mtime):
     """Get the latest GIF for each category"""
     if not GIFS_DIR.exists():
         return []
@@ -161,7 +194,7 @@ with st.sidebar:
 
 # Most Recent Section
 st.header("Most Recent")
-latest_gifs = get_latest_gifs()
+latest_gifs = get_latest_gifs(gifs_dir_mtime())
 
 if latest_gifs:
     cols = st.columns(min(len(latest_gifs), 3))
@@ -187,7 +220,7 @@ else:
 # Simulation History
 st.header("Simulation History")
 
-categories = categorize_gifs()
+categories = categorize_gifs(gifs_dir_mtime())
 
 # Create tabs for each category
 tabs = st.tabs(["Mario Coin", "Sphere + Floor", "Sphere Only", "Rotating Cube", "Kirby"])
@@ -211,8 +244,12 @@ for tab, (category_name, category_key) in zip(tabs, [
                     if i + j < len(gifs):
                         gif_path = gifs[i + j]
                         with col:
-                            st.image(str(gif_path), use_container_width=True)
-                            frame_count = get_frame_count(gif_path)
+                            # Grid tiles show a static thumbnail; the full GIF loads on request
+                            if st.checkbox("Play", key=f"play_{gif_path.name}"):
+                                st.image(str(gif_path), use_container_width=True)
+                            else:
+                                st.image(thumb_path(str(gif_path), gif_path.stat().st_mtime), use_container_width=True)
+                            frame_count = get_frame_count(gif_path.stem)
                             if frame_count > 0:
                                 st.caption(f"{frame_count} frames")
                             else:
@@ -6,9 +6,13 @@ Uses cocotb to simulate the Verilog design and capture VGA frames as images.
 This script can be run standalone to generate PNG frames from the simulation.
 """
 
+import array
 import os
 import sys
+import shutil
 import struct
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
 
 # Check if PIL is available
 try:
@@ -19,6 +23,13 @@ except ImportError:
     print("Warning: PIL/Pillow not installed. Will output raw PPM files.")
     print("Install with: pip install Pillow")
 
+# NumPy is optional; it builds whole frames as arrays
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 
 # VGA timing parameters
 H_DISPLAY = 640
@@ -33,29 +44,84 @@ V_SYNC_PULSE = 2
 V_BACK_PORCH = 33
 V_TOTAL = 525
 
+# Captures are throwaway, so favour write speed over file size (0 = stored, 9 = smallest)
+PNG_COMPRESS_LEVEL = int(os.environ.get('VGA_PNG_LEVEL', 1))
+
+# VGA_RAW=1 captures uncompressed BMP frames, skipping zlib entirely
+FRAME_EXT = 'bmp' if os.environ.get('VGA_RAW') == '1' else 'png'
+
+
+# 2-bit color to 8-bit lookup: 00 -> 0, 01 -> 85, 10 -> 170, 11 -> 255
+_EXT2 = bytes((0, 85, 170, 255))
+
+# 64-entry palette for 6-bit (r<<4)|(g<<2)|b pixel indices
+PALETTE_6BIT = [_EXT2[(v >> shift) & 3] for v in range(64) for shift in (4, 2, 0)]
+_RGB_6BIT = [bytes(PALETTE_6BIT[i * 3:i * 3 + 3]) for i in range(64)]
+
 
 def extend_2bit_to_8bit(val):
     """Extend 2-bit color to 8-bit (0-255)"""
-    # 00 -> 0, 01 -> 85, 10 -> 170, 11 -> 255
-    return (val << 6) | (val << 4) | (val << 2) | val
+    return _EXT2[val]
+
+
+def as_buffer(pixels):
+    """Return pixels as a bytes-like object; lists of ints are packed via array"""
+    if isinstance(pixels, (bytes, bytearray, memoryview)):
+        return pixels
+    return array.array('B', pixels)
 
 
 def save_ppm(filename, pixels, width, height):
-    """Save raw RGB pixels as PPM image"""
-    with open(filename, 'wb') as f:
-        f.write(f"P6\n{width} {height}\n255\n".encode())
-        f.write(bytes(pixels))
+    """Save raw RGB pixels (bytes-like or a list of ints) as PPM image"""
+    # Buffer sized for header plus frame so the whole image goes out in one write
+    with open(filename, 'wb', buffering=width * height * 3 + 64) as f:
+        f.write(b"P6\n%d %d\n255\n" % (width, height))
+        f.write(as_buffer(pixels))
 
 
 def save_png(filename, pixels, width, height):
-    """Save raw RGB pixels as PNG image using PIL"""
-    img = Image.frombytes('RGB', (width, height), bytes(pixels))
-    img.save(filename)
+    """Save raw RGB pixels (bytes-like or a list of ints) as PNG image using PIL"""
+    # frombuffer wraps the pixel data without copying it
+    img = Image.frombuffer('RGB', (width, height), as_buffer(pixels), 'raw', 'RGB', 0, 1)
+    img.save(filename, 'PNG', compress_level=PNG_COMPRESS_LEVEL)
+
+
+def save_bmp(filename, pixels, width, height):
+    """Save raw RGB pixels (any bytes-like object) as an uncompressed 24-bit BMP"""
+    # BMP stores BGR; swap the red and blue bytes of every pixel in a copy
+    bgr = bytearray(pixels)
+    bgr[0::3], bgr[2::3] = bgr[2::3], bgr[0::3]
+    row_size = width * 3
+    pad = -row_size % 4
+    if pad:
+        bgr = b''.join(bgr[y * row_size:(y + 1) * row_size] + bytes(pad) for y in range(height))
+    image_size = (row_size + pad) * height
+    with open(filename, 'wb', buffering=image_size + 64) as f:
+        # BITMAPFILEHEADER + BITMAPINFOHEADER; negative height means rows run top-down
+        f.write(struct.pack('<2sIHHI', b'BM', 54 + image_size, 0, 0, 54))
+        f.write(struct.pack('<IiiHHIIiiII', 40, width, -height, 1, 24, 0, image_size, 2835, 2835, 0, 0))
+        f.write(bgr)
+
+
+def indexed_image(indices, width, height):
+    """Wrap 6-bit pixel indices as a paletted PIL image"""
+    img = Image.frombuffer('P', (width, height), indices, 'raw', 'P', 0, 1)
+    img.putpalette(PALETTE_6BIT)
+    return img
+
+
+def indexed_to_rgb(indices, width, height):
+    """Expand 6-bit pixel indices to raw RGB bytes"""
+    if HAS_PIL:
+        return indexed_image(indices, width, height).convert('RGB').tobytes()
+    return b''.join(map(_RGB_6BIT.__getitem__, indices))
 
 
 def save_frame(filename, pixels, width, height):
-    """Save frame as PNG if PIL available, otherwise PPM"""
-    if HAS_PIL and filename.endswith('.png'):
+    """Save frame as BMP when asked, as PNG if PIL available, otherwise PPM"""
+    if filename.endswith('.bmp'):
+        save_bmp(filename, pixels, width, height)
+    elif HAS_PIL and filename.endswith('.png'):
         save_png(filename, pixels, width, height)
     else:
         # Convert .png to .ppm if no PIL
@@ -65,65 +131,115 @@ def save_frame(filename, pixels, width, height):
     return filename
 
 
+def save_indexed_frame(filename, indices, width, height):
+    """Save 6-bit pixel indices as a palette PNG if PIL available, otherwise RGB PPM"""
+    if HAS_PIL and filename.endswith('.png'):
+        # One byte per pixel gives deflate a third of the data an RGB image would
+        indexed_image(indices, width, height).save(filename, 'PNG', compress_level=PNG_COMPRESS_LEVEL)
+        return filename
+    return save_frame(filename, indexed_to_rgb(indices, width, height), width, height)
+
+
 class VGAFrameCapture:
     """Captures VGA frames from simulation signals"""
     
-    def __init__(self, output_dir='output'):
+    def __init__(self, output_dir='output', video_path=None, verbose=False):
         self.output_dir = output_dir
         os.makedirs(output_dir, exist_ok=True)
         self.frame_count = 0
-        self.pixels = []
-        self.current_line = []
+        # Report every frame only when verbose; otherwise once a second of video
+        self.verbose = verbose
+        self._fname_fmt = os.path.join(output_dir, f'frame_{{:04d}}.{FRAME_EXT}')
+        # With a video path, frames go straight to one ffmpeg process as raw
+        # RGB instead of being encoded as individual PNGs
+        self.ff = None
+        if video_path:
+            if shutil.which('ffmpeg'):
+                self.ff = subprocess.Popen(
+                    ['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                     '-s', f'{H_DISPLAY}x{V_DISPLAY}', '-r', '60', '-i', '-', video_path],
+                    stdin=subprocess.PIPE, bufsize=0)
+                self.video_path = video_path
+            else:
+                print("Warning: ffmpeg not found, saving frames as images instead")
+        # Pillow's zlib releases the GIL, so frames encode on worker threads while
+        # the simulation keeps driving the next one
+        self.pool = ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1))
+        self.futures = []
+        # One frame of 6-bit (r<<4)|(g<<2)|b pixel indices, reused for every frame
+        self.framebuf = bytearray(H_DISPLAY * V_DISPLAY)
         self.h_count = 0
         self.v_count = 0
         
     def clock_pixel(self, r, g, b, hsync, vsync):
         """Process one pixel clock"""
-        # Capture pixel if in visible area
+        # Capture pixel if in visible area, straight into its place in the frame
         if self.h_count < H_DISPLAY and self.v_count < V_DISPLAY:
-            self.current_line.extend([
-                extend_2bit_to_8bit(r),
-                extend_2bit_to_8bit(g),
-                extend_2bit_to_8bit(b)
-            ])
+            self.framebuf[self.v_count * H_DISPLAY + self.h_count] = (r << 4) | (g << 2) | b
         
         # Update horizontal counter
         self.h_count += 1
         if self.h_count >= H_TOTAL:
             self.h_count = 0
-            # Store completed line
-            if self.v_count < V_DISPLAY:
-                self.pixels.extend(self.current_line)
-            self.current_line = []
             
             # Update vertical counter
             self.v_count += 1
             if self.v_count >= V_TOTAL:
                 self.v_count = 0
                 self._save_frame()
-                self.pixels = []
                 
     def _save_frame(self):
         """Save the current frame"""
-        if len(self.pixels) == H_DISPLAY * V_DISPLAY * 3:
-            filename = os.path.join(self.output_dir, f'frame_{self.frame_count:04d}.png')
-            saved_as = save_frame(filename, self.pixels, H_DISPLAY, V_DISPLAY)
-            print(f"Saved frame {self.frame_count}: {saved_as}")
+        if self.ff:
+            self.ff.stdin.write(indexed_to_rgb(self.framebuf, H_DISPLAY, V_DISPLAY))
             self.frame_count += 1
-        else:
-            print(f"Warning: Incomplete frame {self.frame_count} ({len(self.pixels)} bytes)")
+            return
+        # The counters start at the top-left, so every completed frame fills framebuf;
+        # the worker gets a snapshot since framebuf is overwritten by the next frame
+        filename = self._fname_fmt.format(self.frame_count)
+        self.futures.append(self.pool.submit(
+            self._write_frame, self.frame_count, filename, bytes(self.framebuf)))
+        self.frame_count += 1
+    
+    def _write_frame(self, frame_num, filename, indices):
+        """Encode one frame snapshot (runs on a pool thread)"""
+        saved_as = save_indexed_frame(filename, indices, H_DISPLAY, V_DISPLAY)
+        if self.verbose or frame_num % 60 == 0:
+            print(f"Saved frame {frame_num}: {saved_as}")
+    
+    def close(self):
+        """Wait for pending frame writes and finish the video stream, if one is open"""
+        for future in self.futures:
+            future.result()
+        self.futures.clear()
+        self.pool.shutdown()
+        if self.ff:
+            self.ff.stdin.close()
+            self.ff.wait()
+            print(f"Saved {self.frame_count} frames to {self.video_path}")
+            self.ff = None
 
 
 def create_test_frame():
     """Create a test frame with a gradient pattern to verify the pipeline"""
-    pixels = []
-    for y in range(V_DISPLAY):
-        for x in range(H_DISPLAY):
-            # Simple gradient
-            r = int(x / H_DISPLAY * 255)
-            g = int(y / V_DISPLAY * 255)
-            b = 128
-            pixels.extend([r, g, b])
+    # Simple gradient: red follows x, green follows y, blue is constant
+    if HAS_NUMPY:
+        xs = np.arange(H_DISPLAY, dtype=np.uint32)
+        ys = np.arange(V_DISPLAY, dtype=np.uint32)
+        frame = np.empty((V_DISPLAY, H_DISPLAY, 3), np.uint8)
+        frame[..., 0] = (xs * 255 // H_DISPLAY).astype(np.uint8)[None, :]
+        frame[..., 1] = (ys * 255 // V_DISPLAY).astype(np.uint8)[:, None]
+        frame[..., 2] = 128
+        pixels = frame.tobytes()
+    else:
+        # One row template with red and blue filled in; only green changes per row
+        row = bytearray(H_DISPLAY * 3)
+        row[0::3] = bytes(x * 255 // H_DISPLAY for x in range(H_DISPLAY))
+        row[2::3] = bytes([128]) * H_DISPLAY
+        pixels = bytearray()
+        for y in range(V_DISPLAY):
+            row[1::3] = bytes([y * 255 // V_DISPLAY]) * H_DISPLAY
+            pixels += row
     
     os.makedirs('output', exist_ok=True)
     filename = 'output/test_gradient.png'
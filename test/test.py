@@ -24,7 +24,7 @@ V_BACK = 33
 V_TOTAL = 525
 
 
-def decode_vga_output(uo_out):
+def _decode_vga_bits(uo_out):
     """Decode TinyVGA PMOD pinout from uo_out"""
     hsync = (uo_out >> 0) & 1
     vsync = (uo_out >> 4) & 1
@@ -42,6 +42,21 @@ def decode_vga_output(uo_out):
     return hsync, vsync, red, green, blue
 
 
+# uo_out is only 8 bits wide, so every decode is precomputed once at import
+_VGA_LUT = tuple(_decode_vga_bits(u) for u in range(256))
+
+
+def decode_vga_output(uo_out):
+    """Decode TinyVGA PMOD pinout from uo_out as (hsync, vsync, red, green, blue)"""
+    return _VGA_LUT[uo_out]
+
+
+def read_int(sig):
+    """Read a signal as an unsigned int, or None while it holds X/Z bits"""
+    value = sig.value
+    return value.to_unsigned() if value.is_resolvable else None
+
+
 @cocotb.test()
 async def test_reset(dut):
     """Test that design resets properly"""
@@ -89,16 +104,18 @@ async def test_hsync_timing(dut):
     hsync_transitions = 0
     last_hsync = None
     
-    for i in range(H_TOTAL * 2):  # Two complete lines
-        await RisingEdge(dut.clk)
-        try:
-            uo = int(dut.uo_out.value)
-            hsync, _, _, _, _ = decode_vga_output(uo)
-            if last_hsync is not None and hsync != last_hsync:
-                hsync_transitions += 1
-            last_hsync = hsync
-        except:
-            pass
+    # HSYNC (uo_out bit 0) stays low for H_SYNC = 96 clocks, so sampling every
+    # 8 clocks still sees every edge with far fewer scheduler round-trips
+    uo_sig = dut.uo_out
+    for i in range(H_TOTAL * 2 // 8):  # Two complete lines
+        await ClockCycles(dut.clk, 8)
+        value = uo_sig.value
+        if not value.is_resolvable:
+            continue
+        hsync = int(value) & 1
+        if last_hsync is not None and hsync != last_hsync:
+            hsync_transitions += 1
+        last_hsync = hsync
     
     dut._log.info(f"HSYNC transitions in 2 lines: {hsync_transitions}")
     
@@ -132,12 +149,8 @@ async def test_vsync_timing(dut):
     vsync_samples = []
     for line in range(V_TOTAL + 10):
         await ClockCycles(dut.clk, H_TOTAL)
-        try:
-            uo = int(dut.uo_out.value)
-            _, vsync, _, _, _ = decode_vga_output(uo)
-            vsync_samples.append(vsync)
-        except:
-            vsync_samples.append(1)
+        uo = read_int(dut.uo_out)
+        vsync_samples.append(1 if uo is None else decode_vga_output(uo)[1])
     
     # Count VSYNC low period
     vsync_low_count = sum(1 for v in vsync_samples if v == 0)
@@ -176,14 +189,21 @@ async def test_pixel_output(dut):
     # Skip to center line
     await ClockCycles(dut.clk, H_TOTAL * center_y)
     
+    # Store raw uo_out samples per clock; all field decoding happens after the loop
+    uo_sig = dut.uo_out
+    clk_edge = RisingEdge(dut.clk)
+    samples = bytearray(H_DISPLAY)
+    n = 0
     for h in range(H_DISPLAY):
-        await RisingEdge(dut.clk)
-        try:
-            uo = int(dut.uo_out.value)
-            _, _, r, g, b = decode_vga_output(uo)
-            unique_colors.add((r, g, b))
-        except:
-            pass
+        await clk_edge
+        value = uo_sig.value
+        if value.is_resolvable:
+            samples[n] = int(value)
+            n += 1
+    # Mask off the sync bits so each distinct colour is decoded once
+    for uo in {s & 0xEE for s in samples[:n]}:
+        _, _, r, g, b = decode_vga_output(uo)
+        unique_colors.add((r, g, b))
     
     dut._log.info(f"Unique colors in center line: {len(unique_colors)}")
     dut._log.info(f"Colors found: {list(unique_colors)[:8]}")
@@ -213,20 +233,20 @@ async def test_uio_pins(dut):
     await ClockCycles(dut.clk, 10)
     
     # Check uio_oe - should be all inputs (0x00) for this design
-    try:
-        uio_oe = int(dut.uio_oe.value)
+    uio_oe = read_int(dut.uio_oe)
+    if uio_oe is None:
+        dut._log.warning("Could not read uio_oe")
+    else:
         dut._log.info(f"UIO_OE = 0x{uio_oe:02X}")
         assert uio_oe == 0x00, f"UIO_OE should be 0x00 (all inputs), got 0x{uio_oe:02X}"
-    except:
-        dut._log.warning("Could not read uio_oe")
     
     # Check uio_out - should be 0x00 (unused)
-    try:
-        uio_out = int(dut.uio_out.value)
+    uio_out = read_int(dut.uio_out)
+    if uio_out is None:
+        dut._log.warning("Could not read uio_out")
+    else:
         dut._log.info(f"UIO_OUT = 0x{uio_out:02X}")
         assert uio_out == 0x00, f"UIO_OUT should be 0x00, got 0x{uio_out:02X}"
-    except:
-        dut._log.warning("Could not read uio_out")
     
     dut._log.info("UIO pin configuration test passed!")
 
@@ -251,16 +271,15 @@ async def test_frame_generation(dut):
     
     # Wait for VSYNC to go low (start of vertical sync)
     vsync_detected = False
-    for _ in range(H_TOTAL * V_TOTAL * 2):
-        await RisingEdge(dut.clk)
-        try:
-            uo = int(dut.uo_out.value)
-            _, vsync, _, _, _ = decode_vga_output(uo)
-            if vsync == 0:
-                vsync_detected = True
-                break
-        except:
-            pass
+    # VSYNC (uo_out bit 4) stays low for V_SYNC whole lines, so a quarter-line
+    # poll cannot miss it
+    uo_sig = dut.uo_out
+    for _ in range(V_TOTAL * 2 * 4):
+        await ClockCycles(dut.clk, H_TOTAL // 4)
+        value = uo_sig.value
+        if value.is_resolvable and not (int(value) >> 4) & 1:
+            vsync_detected = True
+            break
     
     assert vsync_detected, "VSYNC should be detected within 2 frame periods"
     dut._log.info("Frame generation test passed!")
@@ -285,11 +304,9 @@ async def test_enable_pin(dut):
     await ClockCycles(dut.clk, 100)
     
     # Design should be running
-    try:
-        uo = int(dut.uo_out.value)
+    uo = read_int(dut.uo_out)
+    if uo is not None:
         dut._log.info(f"Output with ena=1: 0x{uo:02X}")
-    except:
-        pass
     
     dut._log.info("Enable pin test passed!")
 
@@ -317,11 +334,9 @@ async def test_basic_functionality(dut):
     await ClockCycles(dut.clk, H_TOTAL * 10)
     
     # Basic output check
-    try:
-        uo = int(dut.uo_out.value)
+    uo = read_int(dut.uo_out)
+    if uo is not None:
         dut._log.info(f"Final uo_out value: 0x{uo:02X}")
-    except:
-        pass
     
     # This assertion is required for TinyTapeout to pass
     # The design is working if we reach this point without errors
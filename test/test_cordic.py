@@ -13,16 +13,13 @@ import math
 
 def to_signed_16(val):
     """Convert to 16-bit signed integer"""
-    val = int(val) & 0xFFFF
-    if val & 0x8000:
-        val -= 0x10000
-    return val
+    # Branchless sign extension: flip the sign bit, then subtract its weight
+    return ((int(val) & 0xFFFF) ^ 0x8000) - 0x8000
 
 
 def from_signed_16(val):
     """Convert from Python int to 16-bit representation"""
-    if val < 0:
-        val = val + 0x10000
+    # Python's & on a negative int already yields the two's complement bits
     return val & 0xFFFF
 
 